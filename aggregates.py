@@ -0,0 +1,139 @@
+"""Persisted aggregates behind the "Show Graph" dashboard.
+
+The cache keeps one record per diary date -- Happiness/Productivity/Nap
+and the done activities as a bitmask -- with the latest entry for a date
+replacing any earlier one, so saving a day twice (or editing it from the
+history view) never double-counts it. Activity done counts and the
+distinct-date count are maintained alongside, and habits() serves the
+same bits as a per-day HabitMatrix (see habits.py) for streaks and heatmaps.
+
+Records live in an append-only sidecar log next to the store (see
+sidecar.py). refresh() compares the store signature (size/mtime) and only
+reads rows appended since the stored cursor, so opening the dashboard and
+saving both cost O(new rows). A store that was rewritten in place fails the
+cursor checksum and triggers a full rebuild.
+"""
+import os
+import threading
+
+from schema import ACTIVITY_COLUMNS, COLUMN_TYPES, parse_value
+from sidecar import SidecarLog
+
+CACHE_VERSION = 2
+SERIES_COLUMNS = ['Date', 'Happiness_Score', 'Productivity_Score', 'Nap_Hours']
+
+
+def cache_path_for(store_path):
+    return os.path.splitext(store_path)[0] + '.agg.json'
+
+
+class AggregateCache:
+
+    def __init__(self, store, path=None):
+        self.store = store
+        self.path = path or cache_path_for(store.path)
+        # The window saves on a writer thread while the dashboard reads.
+        self._lock = threading.RLock()
+        self.log = None
+        self._reset()
+
+    def _reset(self):
+        # date -> [Happiness_Score, Productivity_Score, Nap_Hours, activity bits]
+        self.days = {}
+        self.activity_done = {name: 0 for name in ACTIVITY_COLUMNS}
+        self._habits = None
+
+    def _load(self):
+        # Deferred to the first refresh() so constructing the cache costs
+        # nothing at window startup.
+        self.log = SidecarLog(self.path, CACHE_VERSION)
+        for date, *values in self.log.records():
+            self._set_day(date, values)
+
+    def _set_day(self, date, values):
+        previous = self.days.get(date)
+        bits = values[-1]
+        if previous is not None:
+            bits_removed = previous[-1] & ~bits
+            bits_added = bits & ~previous[-1]
+        else:
+            bits_removed, bits_added = 0, bits
+        for i, name in enumerate(ACTIVITY_COLUMNS):
+            if bits_added >> i & 1:
+                self.activity_done[name] += 1
+            elif bits_removed >> i & 1:
+                self.activity_done[name] -= 1
+        self.days[date] = values
+        if self._habits is not None:
+            self._habits.set(date, bits)
+
+    def refresh(self):
+        """Bring the cache up to date with the store; returns True if it changed."""
+        with self._lock:
+            if self.log is None:
+                self._load()
+            signature = self.store.signature()
+            if signature is None:
+                if self.days:
+                    self._reset()
+                    return True
+                return False
+            if signature == self.log.source:
+                return False
+
+            rows, cursor, full = self.store.read_since(self.log.cursor)
+            if full:
+                self._reset()
+                self.log.reset()
+            records = self.add_rows(rows)
+            try:
+                if self.log.needs_compaction(len(self.days), len(records)):
+                    self.log.rewrite([[date] + values for date, values in self.days.items()], signature, cursor)
+                else:
+                    self.log.append(records, signature, cursor)
+            except OSError as e:
+                print(f"Could not save aggregate cache: {e}")
+            return True
+
+    def add_rows(self, rows):
+        """Apply rows in store order (later rows win); returns the new records."""
+        records = []
+        for row in rows:
+            date = parse_value('date', row.get('Date'))
+            if date is None:
+                continue
+            values = [parse_value(COLUMN_TYPES[name], row.get(name)) for name in SERIES_COLUMNS[1:]]
+            bits = 0
+            for i, name in enumerate(ACTIVITY_COLUMNS):
+                if parse_value('bool', row.get(name)):
+                    bits |= 1 << i
+            values.append(bits)
+            self._set_day(date, values)
+            records.append([date] + values)
+        return records
+
+    @property
+    def total_days(self):
+        return len(self.days)
+
+    @property
+    def row_count(self):
+        """Number of dated entries, counting each date once."""
+        return len(self.days)
+
+    def habits(self):
+        """Snapshot of the per-day activity bits; built on first use, then kept current."""
+        from habits import HabitMatrix
+        with self._lock:
+            if self._habits is None:
+                self._habits = HabitMatrix.from_days(self.days)
+            return self._habits.copy()
+
+    def frame(self):
+        """One row per date (Date, Happiness, Productivity, Nap) sorted by date."""
+        import pandas as pd
+        with self._lock:
+            dates = sorted(self.days)
+            df = pd.DataFrame([self.days[date][:-1] for date in dates], columns=SERIES_COLUMNS[1:], dtype=float)
+            df.insert(0, 'Date', pd.to_datetime(pd.Series(dates, dtype=object)))
+            return df
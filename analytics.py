@@ -0,0 +1,106 @@
+"""Trend analytics over the score and daily-stats columns.
+
+compute_trends() works on whole columns with pandas/NumPy operations:
+the latest entry of each day is kept (as everywhere else), then rolling
+7/30-day means, week-over-week deltas, correlations and the Nap Hours
+distribution around the "Healthy Zone (5-8.5h)" band shown on the
+dashboard are derived from that frame.
+"""
+import numpy as np
+
+SCORE_COLUMNS = ['Happiness_Score', 'Productivity_Score']
+STAT_COLUMNS = ['Nap_Hours', 'Meals', 'Money_Spent']
+ANALYTICS_COLUMNS = ['Date'] + SCORE_COLUMNS + STAT_COLUMNS
+ROLLING_WINDOWS = {'7d': '7D', '30d': '30D'}
+HEALTHY_ZONE = (5.0, 8.5)
+NAP_PERCENTILES = [10, 25, 50, 75, 90]
+
+
+def compute_trends(frame):
+    """Return a dict of trend results for a frame with ANALYTICS_COLUMNS.
+
+    Columns missing from ``frame`` are skipped, so the per-entry series from
+    the aggregate cache (no Meals/Money_Spent) is accepted as well.
+    """
+    import pandas as pd
+
+    columns = [name for name in SCORE_COLUMNS + STAT_COLUMNS if name in frame.columns]
+    df = frame[['Date'] + columns].copy()
+    df['Date'] = pd.to_datetime(df['Date'], errors='coerce')
+    df = df.dropna(subset=['Date']).drop_duplicates('Date', keep='last')
+    for name in columns:
+        df[name] = pd.to_numeric(df[name], errors='coerce')
+
+    daily = df.set_index('Date').sort_index()[columns]
+    trend_columns = [name for name in SCORE_COLUMNS + ['Nap_Hours'] if name in columns]
+    rolling = {label: daily[trend_columns].rolling(window, min_periods=1).mean()
+               for label, window in ROLLING_WINDOWS.items()}
+    weekly = daily[trend_columns].resample('W').mean()
+    week_over_week = weekly.diff()
+
+    result = {
+        'days': len(daily),
+        'daily': daily,
+        'rolling': rolling,
+        'weekly': weekly,
+        'week_over_week': week_over_week,
+        'correlations': df[columns].corr(),
+        'nap_zone': None,
+    }
+
+    if 'Nap_Hours' in columns:
+        naps = df['Nap_Hours'].to_numpy(dtype=float)
+        naps = naps[~np.isnan(naps)]
+        if len(naps):
+            low, high = HEALTHY_ZONE
+            result['nap_zone'] = {
+                'in_zone': float(np.mean((naps >= low) & (naps <= high))),
+                'below': float(np.mean(naps < low)),
+                'above': float(np.mean(naps > high)),
+                'percentiles': dict(zip(NAP_PERCENTILES, np.percentile(naps, NAP_PERCENTILES).tolist())),
+            }
+    return result
+
+
+def _latest(frame, name):
+    if name not in frame.columns or not len(frame):
+        return np.nan
+    return float(frame[name].iloc[-1])
+
+
+def _fmt(value, signed=False):
+    if value is None or np.isnan(value):
+        return 'n/a'
+    return f'{value:+.2f}' if signed else f'{value:.2f}'
+
+
+def summary_lines(result):
+    """Human-readable one-line summaries of a compute_trends() result."""
+    if not result['days']:
+        return ["No entries to analyse yet."]
+    lines = []
+    for label in ROLLING_WINDOWS:
+        rolling = result['rolling'][label]
+        parts = [f"{name.split('_')[0]} {_fmt(_latest(rolling, name))}" for name in SCORE_COLUMNS]
+        lines.append(f"{label[:-1]}-day average: " + ', '.join(parts))
+
+    wow = result['week_over_week']
+    parts = [f"{name.split('_')[0]} {_fmt(_latest(wow, name), signed=True)}" for name in SCORE_COLUMNS]
+    lines.append("Week over week: " + ', '.join(parts))
+
+    zone = result['nap_zone']
+    if zone:
+        low, high = HEALTHY_ZONE
+        percentiles = ' / '.join(f"p{p} {v:.1f}h" for p, v in zone['percentiles'].items())
+        lines.append(f"Healthy Zone ({low:g}-{high:g}h): {zone['in_zone']:.0%} of naps "
+                     f"({zone['below']:.0%} below, {zone['above']:.0%} above); {percentiles}")
+
+    corr = result['correlations']
+    for score in SCORE_COLUMNS:
+        if score not in corr.columns:
+            continue
+        parts = [f"{name.replace('_', ' ')} {_fmt(corr.at[name, score], signed=True)}"
+                 for name in STAT_COLUMNS if name in corr.columns]
+        if parts:
+            lines.append(f"Correlation with {score.split('_')[0]}: " + ', '.join(parts))
+    return lines
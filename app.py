@@ -1,24 +1,86 @@
+import argparse
+import os
 import sys
-import requests
-from io import BytesIO
+import threading
 from PyQt6.QtWidgets import (QApplication, QMainWindow, QLabel, QVBoxLayout, QWidget, QPushButton, 
-                             QLineEdit, QSlider, QCheckBox, QTextEdit, QHBoxLayout, QMessageBox, QGridLayout, QRadioButton)
-from PyQt6.QtGui import QPixmap, QImage
-from PyQt6.QtCore import Qt
-import pandas as pd
+                             QLineEdit, QHBoxLayout, QMessageBox, QDockWidget, QTextBrowser)
+from PyQt6.QtGui import QPixmap
+from PyQt6.QtCore import Qt, QThreadPool, QTimer, pyqtSignal
 from datetime import datetime
-import matplotlib.pyplot as plt
-import os
+from background import BackgroundFetcher, load_cached_image
+from storage import open_store
+from aggregates import AggregateCache
+from date_index import DateIndex
+from drafts import DraftJournal, Task, remove_draft
+from search_index import SearchIndex
+from form import APP_STYLESHEET, DiaryForm, styled_label
+from quotes import quote_of_the_day
+import instrument
+from instrument import span
+
+BACKGROUND_URL = "https://i.postimg.cc/0jtwKScH/Untitled-design-15.jpg"
+BACKGROUND_SIZE = (1200, 800)
+INGEST_URL_VAR = 'DIARY_INGEST_URL'
+
+# pandas and matplotlib are only needed once the user saves or opens the
+# dashboard, so they are never imported at startup. preload_heavy_modules()
+# warms them up on a daemon thread after the window is on screen.
+PRELOAD_MODULES = ["pandas", "matplotlib.dates", "matplotlib.backends.backend_qtagg", "dashboard", "columnar"]
+SEARCH_PRELOAD_DELAY_MS = 1000  # build the search postings once startup work has settled
+
+
+def preload_heavy_modules():
+    def run():
+        import importlib
+        for name in PRELOAD_MODULES:
+            try:
+                importlib.import_module(name)
+            except Exception as e:
+                print(f"Preloading {name} failed: {e}")
+
+    threading.Thread(target=run, name="preload", daemon=True).start()
 
 class DiaryWindow(QMainWindow):
+    entry_saved = pyqtSignal(str)
+
     def __init__(self):
         super().__init__()
         self.setWindowTitle("Funky Virtual Diary")
         self.setGeometry(100, 100, 1200, 700)
-
-        # Load background image from URL
-        self.load_background_image("https://i.postimg.cc/0jtwKScH/Untitled-design-15.jpg")
-
+        self.store = open_store()
+        # When set, entries go through ingest_server.py instead of being appended here.
+        self.ingest_url = os.environ.get(INGEST_URL_VAR)
+        self.entries = DateIndex(self.store)
+        self.aggregates = AggregateCache(self.store)
+        self.columns = None
+        self.text = None
+        # Text analysis has its own thread so it never queues behind or ahead of saves.
+        self.text_pool = QThreadPool(self)
+        self.text_pool.setMaxThreadCount(1)
+        self.text_task = None
+        self.themes_pending = False
+        self.search_index = SearchIndex(self.store)
+        self.dashboard = None
+        self.dashboard_dock = None
+        self.history_dock = None
+
+        self.setStyleSheet(APP_STYLESHEET)
+        with span("window.init"):
+            # Load background image (cached pixels now, network refresh in background)
+            with span("window.background"):
+                self.load_background_image(BACKGROUND_URL)
+            with span("window.widgets"):
+                self.build_widgets()
+        QTimer.singleShot(0, self.form.build_lazily)
+
+        # Unsaved edits are journaled to a draft and restored after a crash.
+        self.drafts = DraftJournal(self.store.path, self.form.edited_values, self)
+        self.form.changed.connect(self.drafts.schedule)
+        self.entry_saved.connect(self.entry_edited)
+        self.restore_draft()
+        QTimer.singleShot(SEARCH_PRELOAD_DELAY_MS, self.preload_search)
+
+    def build_widgets(self):
         # Central widget and layout
         central_widget = QWidget(self)
         self.setCentralWidget(central_widget)
@@ -41,265 +103,54 @@ class DiaryWindow(QMainWindow):
         center_layout = QVBoxLayout(center_widget)
         main_layout.addWidget(center_widget, stretch=2)
 
-        # --- Date Section ---
-        date_label = QLabel(f"Date: {datetime.now().strftime('%Y-%m-%d')}", self)
-        date_label.setStyleSheet("font: bold 12pt 'Comic Sans MS'; color: #8B0000;")
+        # --- Date ---
+        date_label = styled_label(f"Date: {datetime.now().strftime('%Y-%m-%d')}", "subtitle", self)
         left_layout.addWidget(date_label)
 
-        # --- Today's Reflection Section ---
-        reflection_label = QLabel("Today's Reflection", self)
-        reflection_label.setStyleSheet("font: bold 14pt 'Comic Sans MS'; color: #8B0000;")
-        left_layout.addWidget(reflection_label)
-
-        # Happiness Score
-        happiness_label = QLabel("Happiness Score (1-5)", self)
-        happiness_label.setStyleSheet("font: bold 10pt 'Comic Sans MS'; color: #006400;")
-        self.happiness_slider = QSlider(Qt.Orientation.Horizontal)
-        self.happiness_slider.setRange(1, 5)
-        self.happiness_slider.setValue(1)
-        self.happiness_slider.setMaximumWidth(150)
-        happiness_hbox = QHBoxLayout()
-        happiness_hbox.addWidget(happiness_label)
-        happiness_hbox.addWidget(self.happiness_slider)
-        left_layout.addLayout(happiness_hbox)
-
-        # Productivity Score
-        productivity_label = QLabel("Productivity Score (1-5)", self)
-        productivity_label.setStyleSheet("font: bold 10pt 'Comic Sans MS'; color: #006400;")
-        self.productivity_slider = QSlider(Qt.Orientation.Horizontal)
-        self.productivity_slider.setRange(1, 5)
-        self.productivity_slider.setValue(1)
-        self.productivity_slider.setMaximumWidth(150)
-        productivity_hbox = QHBoxLayout()
-        productivity_hbox.addWidget(productivity_label)
-        productivity_hbox.addWidget(self.productivity_slider)
-        left_layout.addLayout(productivity_hbox)
-
-        # Reduce space before Unhappy Moment Section
-        left_layout.addSpacing(-5)
-
-        # Unhappy Moment Section
-        unhappy_reason_label = QLabel("Reason for Unhappy Moment", self)
-        unhappy_reason_label.setStyleSheet("font: bold 10pt 'Comic Sans MS'; color: #006400;")
-        self.unhappy_reason_entry = QTextEdit(self)
-        self.unhappy_reason_entry.setMaximumHeight(100)
-        self.unhappy_reason_entry.setStyleSheet("font: 10pt 'Comic Sans MS'; color: #006666; background-color: rgba(255, 255, 255, 0.8);")
-        unhappy_importance_label = QLabel("Importance of Unhappy Reason", self)
-        unhappy_importance_label.setStyleSheet("font: bold 10pt 'Comic Sans MS'; color: #006400;")
-
-        # Radio buttons for importance
-        self.importance_group = QVBoxLayout()
-        self.radio_important = QRadioButton("Important", self)
-        self.radio_not_important = QRadioButton("Not Important", self)
-        self.radio_should_not_care = QRadioButton("Should Not Care", self)
-        self.radio_important.setStyleSheet("font: 10pt 'Comic Sans MS'; color: #800080;")
-        self.radio_not_important.setStyleSheet("font: 10pt 'Comic Sans MS'; color: #800080;")
-        self.radio_should_not_care.setStyleSheet("font: 10pt 'Comic Sans MS'; color: #800080;")
-        self.radio_important.setChecked(True)  # Default selection
-        self.importance_group.addWidget(self.radio_important)
-        self.importance_group.addWidget(self.radio_not_important)
-        self.importance_group.addWidget(self.radio_should_not_care)
-
-        unhappy_grid = QGridLayout()
-        unhappy_grid.addWidget(unhappy_reason_label, 0, 0)
-        unhappy_grid.addWidget(self.unhappy_reason_entry, 1, 0)
-        unhappy_grid.addWidget(unhappy_importance_label, 0, 1)
-        unhappy_grid.addLayout(self.importance_group, 1, 1)
-        unhappy_grid.setVerticalSpacing(5)
-        left_layout.addLayout(unhappy_grid)
-
-        # Happy Things
-        happy_label = QLabel("2 Things You Were Happy About", self)
-        happy_label.setStyleSheet("font: bold 10pt 'Comic Sans MS'; color: #006400;")
-        left_layout.addWidget(happy_label)
-        self.happy1_entry = QTextEdit(self)
-        self.happy1_entry.setMaximumHeight(80)
-        self.happy1_entry.setStyleSheet("font: 10pt 'Comic Sans MS'; color: #006666; background-color: rgba(255, 255, 255, 0.8);")
-        self.happy2_entry = QTextEdit(self)
-        self.happy2_entry.setMaximumHeight(80)
-        self.happy2_entry.setStyleSheet("font: 10pt 'Comic Sans MS'; color: #006666; background-color: rgba(255, 255, 255, 0.8);")
-        happy_hbox = QHBoxLayout()
-        happy_hbox.addWidget(self.happy1_entry)
-        happy_hbox.addWidget(self.happy2_entry)
-        left_layout.addLayout(happy_hbox)
-
-        # --- Today's Tasks (MoSCoW) Section ---
-        tasks_label = QLabel("Today's Tasks (MoSCoW)", self)
-        tasks_label.setStyleSheet("font: bold 14pt 'Comic Sans MS'; color: #8B0000;")
-        left_layout.addWidget(tasks_label)
-
-        must_label = QLabel("Must Have", self)
-        must_label.setStyleSheet("font: bold 10pt 'Comic Sans MS'; color: #006400;")
-        self.must_entry = QLineEdit(self)
-        self.must_entry.setStyleSheet("font: 10pt 'Comic Sans MS'; color: #006666; background-color: rgba(255, 255, 255, 0.8);")
-        must_hbox = QHBoxLayout()
-        must_hbox.addWidget(must_label)
-        must_hbox.addWidget(self.must_entry)
-        left_layout.addLayout(must_hbox)
-
-        should_label = QLabel("Should Have", self)
-        should_label.setStyleSheet("font: bold 10pt 'Comic Sans MS'; color: #006400;")
-        self.should_entry = QLineEdit(self)
-        self.should_entry.setStyleSheet("font: 10pt 'Comic Sans MS'; color: #006666; background-color: rgba(255, 255, 255, 0.8);")
-        should_hbox = QHBoxLayout()
-        should_hbox.addWidget(should_label)
-        should_hbox.addWidget(self.should_entry)
-        left_layout.addLayout(should_hbox)
-
-        could_label = QLabel("Could Have", self)
-        could_label.setStyleSheet("font: bold 10pt 'Comic Sans MS'; color: #006400;")
-        self.could_entry = QLineEdit(self)
-        self.could_entry.setStyleSheet("font: 10pt 'Comic Sans MS'; color: #006666; background-color: rgba(255, 255, 255, 0.8);")
-        could_hbox = QHBoxLayout()
-        could_hbox.addWidget(could_label)
-        could_hbox.addWidget(self.could_entry)
-        left_layout.addLayout(could_hbox)
-
-        wont_label = QLabel("Won't Have", self)
-        wont_label.setStyleSheet("font: bold 10pt 'Comic Sans MS'; color: #006400;")
-        self.wont_entry = QLineEdit(self)
-        self.wont_entry.setStyleSheet("font: 10pt 'Comic Sans MS'; color: #006666; background-color: rgba(255, 255, 255, 0.8);")
-        wont_hbox = QHBoxLayout()
-        wont_hbox.addWidget(wont_label)
-        wont_hbox.addWidget(self.wont_entry)
-        left_layout.addLayout(wont_hbox)
-
-        notes_label = QLabel("Notes from Today", self)
-        notes_label.setStyleSheet("font: bold 14pt 'Comic Sans MS'; color: #8B0000;")
-        left_layout.addWidget(notes_label)
-        self.notes_text = QTextEdit(self)
-        self.notes_text.setMaximumHeight(100)
-        self.notes_text.setStyleSheet("font: 10pt 'Comic Sans MS'; color: #006666; background-color: rgba(255, 255, 255, 0.8);")
-        left_layout.addWidget(self.notes_text)
-
-        # --- Daily Stats Section ---
-        stats_label = QLabel("Daily Stats", self)
-        stats_label.setStyleSheet("font: bold 14pt 'Comic Sans MS'; color: #8B0000;")
-        right_layout.addWidget(stats_label)
-
-        stats_labels_layout = QHBoxLayout()
-        nap_hours_label = QLabel("Hours of Nap", self)
-        nap_hours_label.setStyleSheet("font: bold 10pt 'Comic Sans MS'; color: #006400;")
-        stats_labels_layout.addWidget(nap_hours_label)
-        meals_label = QLabel("No. of Meals", self)
-        meals_label.setStyleSheet("font: bold 10pt 'Comic Sans MS'; color: #006400;")
-        stats_labels_layout.addWidget(meals_label)
-        money_label = QLabel("Money Spent ($)", self)
-        money_label.setStyleSheet("font: bold 10pt 'Comic Sans MS'; color: #006400;")
-        stats_labels_layout.addWidget(money_label)
-        right_layout.addLayout(stats_labels_layout)
-
-        stats_entries_layout = QHBoxLayout()
-        self.nap_hours_entry = QLineEdit(self)
-        self.nap_hours_entry.setMaximumWidth(100)
-        self.nap_hours_entry.setStyleSheet("font: 10pt 'Comic Sans MS'; color: #006666; background-color: rgba(255, 255, 255, 0.8);")
-        stats_entries_layout.addWidget(self.nap_hours_entry)
-        self.meals_entry = QLineEdit(self)
-        self.meals_entry.setMaximumWidth(100)
-        self.meals_entry.setStyleSheet("font: 10pt 'Comic Sans MS'; color: #006666; background-color: rgba(255, 255, 255, 0.8);")
-        stats_entries_layout.addWidget(self.meals_entry)
-        self.money_entry = QLineEdit(self)
-        self.money_entry.setMaximumWidth(100)
-        self.money_entry.setStyleSheet("font: 10pt 'Comic Sans MS'; color: #006666; background-color: rgba(255, 255, 255, 0.8);")
-        stats_entries_layout.addWidget(self.money_entry)
-        right_layout.addLayout(stats_entries_layout)
-
-        time_wasters_label = QLabel("Time Wasters Today", self)
-        time_wasters_label.setStyleSheet("font: bold 10pt 'Comic Sans MS'; color: #006400;")
-        right_layout.addWidget(time_wasters_label)
-        self.time_wasters_entry = QLineEdit(self)
-        self.time_wasters_entry.setStyleSheet("font: 10pt 'Comic Sans MS'; color: #006666; background-color: rgba(255, 255, 255, 0.8);")
-        right_layout.addWidget(self.time_wasters_entry)
-
-        # --- Tomorrow's Plan Section ---
-        tomorrow_label = QLabel("Tomorrow's Plan", self)
-        tomorrow_label.setStyleSheet("font: bold 14pt 'Comic Sans MS'; color: #8B0000;")
-        right_layout.addWidget(tomorrow_label)
-
-        tasks_tomorrow_label = QLabel("3 Tasks for Tomorrow", self)
-        tasks_tomorrow_label.setStyleSheet("font: bold 10pt 'Comic Sans MS'; color: #006400;")
-        right_layout.addWidget(tasks_tomorrow_label)
-        self.task1_entry = QLineEdit(self)
-        self.task1_entry.setStyleSheet("font: 10pt 'Comic Sans MS'; color: #006666; background-color: rgba(255, 255, 255, 0.8);")
-        self.task1_entry.setPlaceholderText("1)")
-        right_layout.addWidget(self.task1_entry)
-        self.task2_entry = QLineEdit(self)
-        self.task2_entry.setStyleSheet("font: 10pt 'Comic Sans MS'; color: #006666; background-color: rgba(255, 255, 255, 0.8);")
-        self.task2_entry.setPlaceholderText("2)")
-        right_layout.addWidget(self.task2_entry)
-        self.task3_entry = QLineEdit(self)
-        self.task3_entry.setStyleSheet("font: 10pt 'Comic Sans MS'; color: #006666; background-color: rgba(255, 255, 255, 0.8);")
-        self.task3_entry.setPlaceholderText("3)")
-        right_layout.addWidget(self.task3_entry)
-
-        mistakes_label = QLabel("Mistakes to Avoid Tomorrow", self)
-        mistakes_label.setStyleSheet("font: bold 10pt 'Comic Sans MS'; color: #006400;")
-        right_layout.addWidget(mistakes_label)
-        self.mistakes_entry = QLineEdit(self)
-        self.mistakes_entry.setStyleSheet("font: 10pt 'Comic Sans MS'; color: #006666; background-color: rgba(255, 255, 255, 0.8);")
-        right_layout.addWidget(self.mistakes_entry)
-
-        change_label = QLabel("3 Things to Change About Yourself", self)
-        change_label.setStyleSheet("font: bold 10pt 'Comic Sans MS'; color: #006400;")
-        right_layout.addWidget(change_label)
-        self.change1_entry = QLineEdit(self)
-        self.change1_entry.setStyleSheet("font: 10pt 'Comic Sans MS'; color: #006666; background-color: rgba(255, 255, 255, 0.8);")
-        self.change1_entry.setPlaceholderText("1)")
-        right_layout.addWidget(self.change1_entry)
-        self.change2_entry = QLineEdit(self)
-        self.change2_entry.setStyleSheet("font: 10pt 'Comic Sans MS'; color: #006666; background-color: rgba(255, 255, 255, 0.8);")
-        self.change2_entry.setPlaceholderText("2)")
-        right_layout.addWidget(self.change2_entry)
-        self.change3_entry = QLineEdit(self)
-        self.change3_entry.setStyleSheet("font: 10pt 'Comic Sans MS'; color: #006666; background-color: rgba(255, 255, 255, 0.8);")
-        self.change3_entry.setPlaceholderText("3)")
-        right_layout.addWidget(self.change3_entry)
-
-        # --- Did Today Section ---
-        did_today_label = QLabel("Did Today:", self)
-        did_today_label.setStyleSheet("font: bold 14pt 'Comic Sans MS'; color: #8B0000;")
-        right_layout.addWidget(did_today_label)
-
-        did_today_row1 = QHBoxLayout()
-        self.coding_check = QCheckBox("Coding", self)
-        self.coding_check.setStyleSheet("font: 12pt 'Comic Sans MS'; color: #800080;")
-        did_today_row1.addWidget(self.coding_check)
-        self.gate_check = QCheckBox("Gate Classes", self)
-        self.gate_check.setStyleSheet("font: 12pt 'Comic Sans MS'; color: #800080;")
-        did_today_row1.addWidget(self.gate_check)
-        self.speaking_check = QCheckBox("Speaking Skills", self)
-        self.speaking_check.setStyleSheet("font: 12pt 'Comic Sans MS'; color: #800080;")
-        did_today_row1.addWidget(self.speaking_check)
-        right_layout.addLayout(did_today_row1)
-
-        did_today_row2 = QHBoxLayout()
-        self.workout_check = QCheckBox("Walk/Workout", self)
-        self.workout_check.setStyleSheet("font: 12pt 'Comic Sans MS'; color: #800080;")
-        did_today_row2.addWidget(self.workout_check)
-        self.meditation_check = QCheckBox("Meditation", self)
-        self.meditation_check.setStyleSheet("font: 12pt 'Comic Sans MS'; color: #800080;")
-        did_today_row2.addWidget(self.meditation_check)
-        right_layout.addLayout(did_today_row2)
+        # --- Entry form (sections from schema.FIELDS, filled in after the first paint) ---
+        self.form = DiaryForm(self, {"left": left_layout, "right": right_layout})
 
         # Add spacing between Did Today and buttons
         right_layout.addSpacing(20)
 
         # --- Buttons Section ---
-        save_button = QPushButton("Save Entry", self)
-        save_button.setStyleSheet("background-color: green; color: white; font: 12pt 'Comic Sans MS';")
-        save_button.clicked.connect(self.save_data)
-        right_layout.addWidget(save_button)
+        self.save_button = QPushButton("Save Entry", self)
+        self.save_button.setObjectName("saveButton")
+        self.save_button.clicked.connect(self.save_data)
+        right_layout.addWidget(self.save_button)
 
         graph_button = QPushButton("Show Graph", self)
-        graph_button.setStyleSheet("background-color: blue; color: white; font: 12pt 'Comic Sans MS';")
+        graph_button.setObjectName("graphButton")
         graph_button.clicked.connect(self.plot_data)
         right_layout.addWidget(graph_button)
 
+        history_button = QPushButton("Browse History", self)
+        history_button.setObjectName("historyButton")
+        history_button.clicked.connect(self.show_history)
+        right_layout.addWidget(history_button)
+
+        # --- Search Section ---
+        search_label = styled_label("Search Your Diary", "subtitle", self)
+        center_layout.addWidget(search_label)
+        self.search_entry = QLineEdit(self)
+        self.search_entry.setPlaceholderText("Words from notes, reasons, tasks...")
+        center_layout.addWidget(self.search_entry)
+        self.search_results = QTextBrowser(self)
+        self.search_results.setMaximumHeight(260)
+        self.search_results.setObjectName("searchResults")
+        self.search_results.hide()
+        center_layout.addWidget(self.search_results)
+        # Search as you type, once typing pauses
+        self.search_timer = QTimer(self)
+        self.search_timer.setSingleShot(True)
+        self.search_timer.setInterval(150)
+        self.search_timer.timeout.connect(self.run_search)
+        self.search_entry.textChanged.connect(self.search_timer.start)
+
         # --- Quote of the Day ---
-        self.quotes = [f"Quote of the Day {i}: Keep shining!" for i in range(1, 366)]
-        day_of_year = datetime.now().timetuple().tm_yday - 1
-        quote_label = QLabel(self.quotes[day_of_year], self)
-        quote_label.setStyleSheet("font: italic 12pt 'Comic Sans MS'; color: #006666; padding: 5px;")
+        with span("window.quote"):
+            quote_label = QLabel(quote_of_the_day(), self)
+        quote_label.setObjectName("quote")
         quote_label.setAlignment(Qt.AlignmentFlag.AlignCenter)
         quote_label.setWordWrap(True)
         quote_label.setFixedWidth(220)
@@ -308,184 +159,244 @@ class DiaryWindow(QMainWindow):
         center_layout.addStretch(1)
 
     def load_background_image(self, url):
+        width, height = BACKGROUND_SIZE
+        self.background_label = QLabel(self)
+        self.background_label.setObjectName("background")
+        self.background_label.setGeometry(0, 0, 1200, 700)
+        self.background_label.lower()
+
+        image, needs_refresh = load_cached_image(url, width, height)
+        # Until an image arrives the label shows the plain fallback colour.
+        if image is not None:
+            self.set_background_image(image)
+
+        if needs_refresh:
+            self.background_fetcher = BackgroundFetcher(url, width, height, have_cached=image is not None, parent=self)
+            self.background_fetcher.image_ready.connect(self.set_background_image)
+            self.background_fetcher.start()
+
+    def set_background_image(self, image):
+        self.background_label.setPixmap(QPixmap.fromImage(image))
+        self.background_label.lower()
+        print("Background image set.")
+
+    def show_trace_summary(self, names):
+        if not instrument.enabled():
+            return
+        lines = instrument.summary_lines()
+        self.statusBar().showMessage(" | ".join(l for l in lines if l.split(":")[0] in names))
+        self.statusBar().setToolTip("\n".join(lines))
+
+    def closeEvent(self, event):
+        self.drafts.flush()
+        self.drafts.wait()
+        fetcher = getattr(self, "background_fetcher", None)
+        if fetcher is not None:
+            fetcher.detach()
+        super().closeEvent(event)
+
+    def preload_search(self):
+        # Building the postings of a long history takes a while; do it before the first search.
+        def run():
+            try:
+                self.search_index.preload()
+            except Exception as e:
+                print(f"Preloading the search index failed: {e}")
+
+        threading.Thread(target=run, name="search-preload", daemon=True).start()
+
+    def run_search(self):
+        query = self.search_entry.text().strip()
+        if not query:
+            self.search_results.hide()
+            return
         try:
-            response = requests.get(url)
-            if response.status_code == 200:
-                img_data = BytesIO(response.content)
-                image = QImage.fromData(img_data.read())
-                pixmap = QPixmap.fromImage(image).scaled(1200, 800)
-                background_label = QLabel(self)
-                background_label.setPixmap(pixmap)
-                background_label.setGeometry(0, 0, 1200, 700)
-                background_label.lower()
-                print("Background image set.")
-            else:
-                print(f"Failed to load image. Status code: {response.status_code}")
-                self.setStyleSheet("background-color: #F5D6BA;")
+            hits = self.search_index.search(query)
         except Exception as e:
-            print(f"Error loading image: {e}")
-            self.setStyleSheet("background-color: #F5D6BA;")
+            print(f"Search failed: {e}")
+            return
+        if hits:
+            items = [f"<p><b>{hit['date']}</b> <i>({hit['field'].replace('_', ' ')})</i><br>{hit['snippet']}</p>"
+                     for hit in hits]
+            self.search_results.setHtml("".join(items))
+        else:
+            self.search_results.setHtml("<p><i>No matching entries.</i></p>")
+        self.search_results.show()
 
     def save_data(self):
-        if self.radio_important.isChecked():
-            unhappy_importance = "important"
-        elif self.radio_not_important.isChecked():
-            unhappy_importance = "not important"
-        else:
-            unhappy_importance = "should not care"
-
-        data = {
-            'Date': [datetime.now().strftime("%Y-%m-%d")],
-            'Task1_Tomorrow': [self.task1_entry.text()],
-            'Task2_Tomorrow': [self.task2_entry.text()],
-            'Task3_Tomorrow': [self.task3_entry.text()],
-            'Happiness_Score': [self.happiness_slider.value()],
-            'Productivity_Score': [self.productivity_slider.value()],
-            'Must_Have': [self.must_entry.text()],
-            'Should_Have': [self.should_entry.text()],
-            'Could_Have': [self.could_entry.text()],
-            'Wont_Have': [self.wont_entry.text()],
-            'Unhappy_Reason': [self.unhappy_reason_entry.toPlainText().strip()],
-            'Unhappy_Importance': [unhappy_importance],
-            'Happy_Thing1': [self.happy1_entry.toPlainText().strip()],
-            'Happy_Thing2': [self.happy2_entry.toPlainText().strip()],
-            'Change1': [self.change1_entry.text()],
-            'Change2': [self.change2_entry.text()],
-            'Change3': [self.change3_entry.text()],
-            'Time_Wasters': [self.time_wasters_entry.text()],
-            'Mistakes': [self.mistakes_entry.text()],
-            'Meals': [self.meals_entry.text()],
-            'Money_Spent': [self.money_entry.text()],
-            'Nap_Hours': [self.nap_hours_entry.text()],
-            'Did_Coding': [self.coding_check.isChecked()],
-            'Gate_Classes': [self.gate_check.isChecked()],
-            'Speaking_Skills': [self.speaking_check.isChecked()],
-            'Workout': [self.workout_check.isChecked()],
-            'Meditation': [self.meditation_check.isChecked()],
-            'Notes': [self.notes_text.toPlainText().strip()]
-        }
-
-        df = pd.DataFrame(data)
-        try:
-            df.to_csv('diary_data.csv', mode='a', header=not os.path.exists('diary_data.csv'), index=False)
-            QMessageBox.information(self, "Success", "Diary entry saved successfully!")
-        except PermissionError:
+        data = {'Date': datetime.now().strftime("%Y-%m-%d"), **self.form.values()}
+        self.save_button.setEnabled(False)
+        self.statusBar().showMessage("Saving...")
+        # Pending edits reach the draft first; it is removed only once the save lands.
+        snapshot = self.drafts.flush()
+        self.drafts.submit(self.write_entry, data,
+                           finished=lambda date: self.save_finished(date, snapshot),
+                           failed=self.save_failed)
+
+    def write_entry(self, data):
+        # Runs on the draft journal's writer thread.
+        date = self.store_entry(data)
+        remove_draft(self.drafts.path)
+        return date
+
+    def store_entry(self, data):
+        # Runs on the draft journal's writer thread, for the form and for history edits.
+        with span("save"):
+            with span("save.append"):
+                if self.ingest_url:
+                    # Another process owns the writes; the server commits before replying.
+                    from ingest_server import submit_entries
+                    submit_entries(self.ingest_url, [data])
+                else:
+                    # Saving the same day again replaces that day's entry.
+                    self.entries.upsert(data)
+            with span("save.aggregates"):
+                self.aggregates.refresh()
+            with span("save.search_index"):
+                self.search_index.update()
+        return data['Date']
+
+    def save_finished(self, date, snapshot):
+        self.save_button.setEnabled(True)
+        self.drafts.mark_saved(snapshot)
+        self.statusBar().showMessage(f"Diary entry for {date} saved.", 5000)
+        self.show_trace_summary(("save", "plot"))
+        self.entry_saved.emit(date)
+
+    def save_failed(self, error):
+        self.save_button.setEnabled(True)
+        self.statusBar().showMessage("Diary entry not saved; your draft is kept.")
+        if isinstance(error, PermissionError):
             QMessageBox.critical(self, "Permission Error", 
-                                 "Cannot save to 'diary_data.csv'. It may be open elsewhere or you lack permissions.")
-        except Exception as e:
-            QMessageBox.critical(self, "Save Error", f"An error occurred while saving: {str(e)}")
+                                 f"Cannot save to '{self.store.path}'. It may be open elsewhere or you lack permissions.")
+        else:
+            QMessageBox.critical(self, "Save Error", f"An error occurred while saving: {str(error)}")
+
+    def restore_draft(self):
+        draft = self.drafts.load()
+        if draft is None:
+            return
+        self.form.set_values(draft['values'])
+        saved_at = datetime.fromtimestamp(draft['saved_at']).strftime("%Y-%m-%d %H:%M")
+        self.statusBar().showMessage(f"Restored your unsaved draft from {saved_at}.", 10000)
 
     def plot_data(self):
         try:
-            df = pd.read_csv('diary_data.csv', on_bad_lines='skip')
-            if df.empty:
-                QMessageBox.warning(self, "Data Error", "No data available to plot!")
-                return
-
-            # Convert Date to datetime for better handling
-            df['Date'] = pd.to_datetime(df['Date'])
-            df = df.sort_values('Date')  # Ensure data is sorted by date
-            total_days = len(df['Date'].unique())
-
-            # --- Figure 1: Productivity & Happiness Trends ---
-            fig1 = plt.figure(figsize=(6, 4), facecolor='none')
-            fig1.patch.set_alpha(0)  # Transparent background
-            ax1 = fig1.add_subplot(111)
-            ax1.patch.set_alpha(0)  # Transparent axes background
-            ax1.plot(df['Date'], df['Happiness_Score'], marker='o', label='Happiness', color='#ff6f61', linewidth=1.5)
-            ax1.plot(df['Date'], df['Productivity_Score'], marker='o', label='Productivity', color='#6b5b95', linewidth=1.5)
-            ax1.set_title('Happiness & Productivity', fontsize=12, color='#333333')
-            ax1.set_xlabel('Date', fontsize=10)
-            ax1.set_ylabel('Score (1-5)', fontsize=10)
-            ax1.legend(loc='upper left', fontsize=8, frameon=True, facecolor='#ffffff', edgecolor='#2f4f4f')
-            ax1.set_xticks(df['Date'])
-            ax1.tick_params(axis='x', rotation=45, labelsize=8)
-            ax1.set_ylim(0, max(df[['Happiness_Score', 'Productivity_Score']].max()) + 1)
-            for spine in ax1.spines.values():
-                spine.set_edgecolor('#333333')
-                spine.set_linewidth(0.5)
-            plt.tight_layout()
-
-            # --- Figure 2: Nap Hours (Scatter Plot) ---
-            fig2 = plt.figure(figsize=(6, 3), facecolor='none')
-            fig2.patch.set_alpha(0)  # Transparent background
-            ax2 = fig2.add_subplot(111)
-            ax2.set_facecolor('#ff6f61')  # Red background
-            ax2.patch.set_alpha(0.3)  # Set transparency for red background
-            ax2.axhspan(5, 8.5, facecolor='#88d8b0', alpha=0.3, label='Healthy Zone (5-8.5h)')  # Green zone with transparency
-            ax2.scatter(df['Date'], df['Nap_Hours'].astype(float), color='black', s=50, label='Nap Hours')
-            ax2.set_title('Nap Hours', fontsize=12, color='#333333')
-            ax2.set_xlabel('Date', fontsize=10)
-            ax2.set_ylabel('Hours', fontsize=10)
-            ax2.legend(loc='upper left', fontsize=8, frameon=True, facecolor='#ffffff', edgecolor='#2f4f4f')
-            ax2.set_xticks(df['Date'])
-            ax2.tick_params(axis='x', rotation=45, labelsize=8)
-            ax2.set_ylim(0, max(df['Nap_Hours'].astype(float)) + 1)
-            for spine in ax2.spines.values():
-                spine.set_edgecolor('#333333')
-                spine.set_linewidth(1.5)
-            plt.tight_layout()
-
-            # --- Figure 3: Pie Charts ---
-            fig3 = plt.figure(figsize=(8, 6), facecolor='none')
-            fig3.patch.set_alpha(0)  # Transparent background
-            activity_cols = ['Did_Coding', 'Gate_Classes', 'Speaking_Skills', 'Workout', 'Meditation']
-
-            # Row 1: 2 Pie Charts
-            ax3 = fig3.add_axes([0.05, 0.7, 0.3, 0.25], aspect='equal')
-            ax3.patch.set_alpha(0)  # Transparent axes background
-            done = df[activity_cols[0]].sum()
-            not_done = total_days - done
-            ax3.pie([done, not_done], labels=['Done', 'Not Done'], colors=['#88d8b0', '#ffcc5c'], 
-                    autopct='%1.1f%%', startangle=90, textprops={'fontsize': 8})
-            ax3.set_title(f'{activity_cols[0].replace("Did_", "")}', fontsize=10, color='#333333', y=1.1)
-
-            ax4 = fig3.add_axes([0.45, 0.7, 0.3, 0.25], aspect='equal')
-            ax4.patch.set_alpha(0)  # Transparent axes background
-            done = df[activity_cols[1]].sum()
-            not_done = total_days - done
-            ax4.pie([done, not_done], labels=['Done', 'Not Done'], colors=['#88d8b0', '#ffcc5c'], 
-                    autopct='%1.1f%%', startangle=90, textprops={'fontsize': 8})
-            ax4.set_title(f'{activity_cols[1].replace("Did_", "")}', fontsize=10, color='#333333', y=1.1)
-
-            # Row 2: 2 Pie Charts
-            ax5 = fig3.add_axes([0.05, 0.35, 0.3, 0.25], aspect='equal')
-            ax5.patch.set_alpha(0)  # Transparent axes background
-            done = df[activity_cols[2]].sum()
-            not_done = total_days - done
-            ax5.pie([done, not_done], labels=['Done', 'Not Done'], colors=['#88d8b0', '#ffcc5c'], 
-                    autopct='%1.1f%%', startangle=90, textprops={'fontsize': 8})
-            ax5.set_title(f'{activity_cols[2].replace("Did_", "")}', fontsize=10, color='#333333', y=1.1)
-
-            ax6 = fig3.add_axes([0.45, 0.35, 0.3, 0.25], aspect='equal')
-            ax6.patch.set_alpha(0)  # Transparent axes background
-            done = df[activity_cols[3]].sum()
-            not_done = total_days - done
-            ax6.pie([done, not_done], labels=['Done', 'Not Done'], colors=['#88d8b0', '#ffcc5c'], 
-                    autopct='%1.1f%%', startangle=90, textprops={'fontsize': 8})
-            ax6.set_title(f'{activity_cols[3].replace("Did_", "")}', fontsize=10, color='#333333', y=1.1)
-
-            # Row 3: 1 Pie Chart
-            ax7 = fig3.add_axes([0.25, 0.05, 0.3, 0.25], aspect='equal')
-            ax7.patch.set_alpha(0)  # Transparent axes background
-            done = df[activity_cols[4]].sum()
-            not_done = total_days - done
-            ax7.pie([done, not_done], labels=['Done', 'Not Done'], colors=['#88d8b0', '#ffcc5c'], 
-                    autopct='%1.1f%%', startangle=90, textprops={'fontsize': 8})
-            ax7.set_title(f'{activity_cols[4].replace("Did_", "")}', fontsize=10, color='#333333', y=1.1)
-
-            plt.tight_layout()
-
-            # Show all figures
-            plt.show()
-
+            with span("plot"):
+                self.show_dashboard()
+            self.show_trace_summary(("save", "plot"))
         except FileNotFoundError:
             QMessageBox.warning(self, "File Error", "No data found. Start writing your diary first!")
         except Exception as e:
             QMessageBox.critical(self, "Plot Error", f"An error occurred while plotting: {str(e)}")
 
+    def show_dashboard(self):
+        if not self.store.exists():
+            raise FileNotFoundError(self.store.path)
+        with span("plot.aggregates"):
+            self.aggregates.refresh()
+        if self.aggregates.row_count == 0:
+            QMessageBox.warning(self, "Data Error", "No data available to plot!")
+            return
+
+        if self.dashboard_dock is None:
+            with span("plot.create_dashboard"):
+                from dashboard import DashboardPanel
+                self.dashboard = DashboardPanel(self)
+                self.dashboard_dock = QDockWidget("Dashboard", self)
+                self.dashboard_dock.setWidget(self.dashboard)
+                self.addDockWidget(Qt.DockWidgetArea.RightDockWidgetArea, self.dashboard_dock)
+                self.dashboard_dock.setFloating(True)
+                self.dashboard_dock.resize(1000, 760)
+
+        from analytics import ANALYTICS_COLUMNS, compute_trends
+        if self.columns is None:
+            from columnar import ColumnarCache
+            self.columns = ColumnarCache(self.store)
+        with span("plot.columnar"):
+            self.columns.refresh()
+            frame = self.columns.load_frame(ANALYTICS_COLUMNS)
+        with span("plot.analytics"):
+            trends = compute_trends(frame)
+        with span("plot.habits"):
+            habits = self.aggregates.habits()
+        self.dashboard.update_data(self.aggregates.frame(), self.aggregates.activity_done,
+                                   self.aggregates.total_days, trends, habits)
+        self.dashboard_dock.show()
+        self.dashboard_dock.raise_()
+        self.refresh_themes()
+
+    def refresh_themes(self):
+        """Analyse new diary text on a worker thread; the Themes tab updates when it is done."""
+        if self.text_task is not None:
+            # One refresh at a time; the latest request runs after it.
+            self.themes_pending = True
+            return
+        if self.text is None:
+            from text_analytics import TextCache
+            self.text = TextCache(self.store)
+        self.themes_pending = False
+        self.text_task = Task(self.compute_themes)
+        self.text_task.signals.finished.connect(self.themes_finished)
+        self.text_task.signals.failed.connect(self.themes_failed)
+        self.text_pool.start(self.text_task)
+
+    def compute_themes(self):
+        # Runs on the text pool's thread.
+        with span("plot.text"):
+            self.text.refresh()
+            return self.text.themes()
+
+    def themes_finished(self, themes):
+        self.text_task = None
+        self.dashboard.set_themes(themes)
+        if self.themes_pending:
+            self.refresh_themes()
+
+    def themes_failed(self, error):
+        self.text_task = None
+        print(f"Could not analyse diary text: {error}")
+        if self.themes_pending:
+            self.refresh_themes()
+
+    def show_history(self):
+        if self.history_dock is None:
+            from history import HistoryPanel
+            self.history = HistoryPanel(self.entries, self.save_edit, self)
+            self.history.model.entry_changed.connect(self.entry_edited)
+            self.history_dock = QDockWidget("History", self)
+            self.history_dock.setWidget(self.history)
+            self.addDockWidget(Qt.DockWidgetArea.BottomDockWidgetArea, self.history_dock)
+            self.history_dock.setFloating(True)
+            self.history_dock.resize(1000, 400)
+        with span("history.reload"):
+            self.history.reload()
+        self.history_dock.show()
+        self.history_dock.raise_()
+
+    def save_edit(self, row, finished):
+        self.drafts.submit(self.store_entry, row, finished=finished, failed=self.edit_failed)
+
+    def edit_failed(self, error):
+        self.statusBar().showMessage("History edit not saved.", 5000)
+        QMessageBox.critical(self, "Save Error", f"An error occurred while saving the edit: {str(error)}")
+
+    def entry_edited(self, date):
+        if self.dashboard_dock is not None and self.dashboard_dock.isVisible():
+            self.plot_data()
+
 if __name__ == "__main__":
-    app = QApplication(sys.argv)
+    parser = argparse.ArgumentParser(description="Personal diary with dashboards.")
+    parser.add_argument('--trace', nargs='?', const="diary_trace.json", metavar='PATH',
+                        help="write a Chrome trace of hot paths to PATH on exit")
+    # Everything else (-platform, -style, ...) is left for Qt.
+    args, qt_args = parser.parse_known_args()
+    if args.trace:
+        instrument.enable(args.trace)
+    else:
+        instrument.enable_from_env()
+    app = QApplication(sys.argv[:1] + qt_args)
     window = DiaryWindow()
     window.show()
-    sys.exit(app.exec())
\ No newline at end of file
+    QTimer.singleShot(0, preload_heavy_modules)
+    sys.exit(app.exec())
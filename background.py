@@ -0,0 +1,171 @@
+"""Background image loading for DiaryWindow.
+
+The image is fetched on a worker thread and cached on disk as raw, pre-scaled
+pixels, so a warm start shows the background with no network I/O and no
+image decode. The cached copy is revalidated with ETag/Last-Modified once it
+is older than CACHE_MAX_AGE, and the bundled jpg is used when the network
+is unavailable.
+"""
+import hashlib
+import json
+import os
+import time
+
+from PyQt6.QtCore import QThread, pyqtSignal, Qt
+from PyQt6.QtGui import QImage
+
+from instrument import span
+
+APP_DIR = os.path.dirname(os.path.abspath(__file__))
+CACHE_DIR = os.path.join(APP_DIR, ".diary_cache")
+BUNDLED_IMAGE = os.path.join(APP_DIR, "Untitled design (15).jpg")
+CACHE_MAX_AGE = 24 * 60 * 60
+FALLBACK_RETRY_AGE = 10 * 60  # retry the network this often after a fallback
+FETCH_TIMEOUT = (3, 10)  # (connect, read) seconds
+IMAGE_FORMAT = QImage.Format.Format_RGB32
+
+_detached = set()  # fetchers still running after their window closed
+
+
+def _cache_paths(url, width, height):
+    key = hashlib.sha1(f"{url}|{width}x{height}".encode("utf-8")).hexdigest()[:16]
+    base = os.path.join(CACHE_DIR, f"bg_{key}")
+    return base + ".rgb32", base + ".json"
+
+
+def _write_atomic(path, data):
+    os.makedirs(os.path.dirname(path), exist_ok=True)
+    tmp_path = f"{path}.tmp{os.getpid()}"
+    with open(tmp_path, "wb") as f:
+        f.write(data)
+    os.replace(tmp_path, path)
+
+
+def _read_meta(meta_path):
+    try:
+        with open(meta_path, "r", encoding="utf-8") as f:
+            return json.load(f)
+    except (OSError, ValueError):
+        return {}
+
+
+def load_cached_image(url, width, height):
+    """Return (QImage or None, needs_refresh) from the on-disk cache."""
+    raw_path, meta_path = _cache_paths(url, width, height)
+    meta = _read_meta(meta_path)
+    if meta.get("width") != width or meta.get("height") != height:
+        return None, True
+    try:
+        with open(raw_path, "rb") as f:
+            raw = f.read()
+    except OSError:
+        return None, True
+    if len(raw) != width * height * 4:
+        return None, True
+    # Wrapping the raw buffer is a copy, not a decode; copy() detaches the
+    # image from the Python bytes object before it goes out of scope.
+    image = QImage(raw, width, height, width * 4, IMAGE_FORMAT).copy()
+    max_age = CACHE_MAX_AGE if meta.get("source") == "network" else FALLBACK_RETRY_AGE
+    stale = time.time() - meta.get("fetched_at", 0) > max_age
+    return image, stale
+
+
+def _scale(image, width, height):
+    return image.scaled(width, height, Qt.AspectRatioMode.IgnoreAspectRatio,
+                        Qt.TransformationMode.SmoothTransformation).convertToFormat(IMAGE_FORMAT)
+
+
+class BackgroundFetcher(QThread):
+    """Fetch, decode and scale the background image off the UI thread.
+
+    Emits image_ready with a QImage only when the pixels changed; a 304
+    revalidation just refreshes the cache timestamp.
+
+    Call detach() instead of waiting when the window closes: the fetch may
+    sit in a network timeout for seconds. A detached fetcher is kept alive
+    until it finishes and neither caches nor emits its result.
+    """
+    image_ready = pyqtSignal(QImage)
+
+    def __init__(self, url, width, height, have_cached=False, parent=None):
+        super().__init__(parent)
+        self.url = url
+        self.width = width
+        self.height = height
+        self.have_cached = have_cached
+
+    def detach(self):
+        """Let the fetch finish on its own, discarding its result."""
+        self.requestInterruption()
+        try:
+            self.image_ready.disconnect()
+        except TypeError:
+            pass
+        if self.isRunning():
+            self.setParent(None)
+            _detached.add(self)
+            self.finished.connect(lambda: _detached.discard(self))
+
+    def run(self):
+        raw_path, meta_path = _cache_paths(self.url, self.width, self.height)
+        meta = _read_meta(meta_path)
+        try:
+            with span("background.fetch", url=self.url):
+                image, new_meta = self._fetch(meta)
+        except Exception as e:
+            print(f"Error loading image: {e}")
+            image, new_meta = None, None
+
+        if self.isInterruptionRequested():
+            return
+        if image is None and new_meta is None:
+            if self.have_cached:
+                return
+            image = QImage(BUNDLED_IMAGE)
+            if image.isNull():
+                print("Failed to load bundled background image.")
+                return
+            new_meta = {"source": "bundled"}
+        elif image is None:
+            # 304 Not Modified: cached pixels are still current.
+            _write_atomic(meta_path, json.dumps(new_meta).encode("utf-8"))
+            return
+
+        with span("background.scale"):
+            image = _scale(image, self.width, self.height)
+        new_meta.update({"width": self.width, "height": self.height,
+                         "fetched_at": time.time()})
+        try:
+            _write_atomic(raw_path, image.constBits().asstring(image.sizeInBytes()))
+            _write_atomic(meta_path, json.dumps(new_meta).encode("utf-8"))
+        except OSError as e:
+            print(f"Could not cache background image: {e}")
+        self.image_ready.emit(image)
+
+    def _fetch(self, meta):
+        import requests
+
+        headers = {}
+        if self.have_cached and meta.get("source") == "network":
+            if meta.get("etag"):
+                headers["If-None-Match"] = meta["etag"]
+            if meta.get("last_modified"):
+                headers["If-Modified-Since"] = meta["last_modified"]
+
+        response = requests.get(self.url, headers=headers, timeout=FETCH_TIMEOUT)
+        if response.status_code == 304:
+            meta["fetched_at"] = time.time()
+            return None, meta
+        if response.status_code != 200:
+            print(f"Failed to load image. Status code: {response.status_code}")
+            return None, None
+
+        image = QImage.fromData(response.content)
+        if image.isNull():
+            print("Downloaded background image could not be decoded.")
+            return None, None
+        return image, {
+            "source": "network",
+            "etag": response.headers.get("ETag"),
+            "last_modified": response.headers.get("Last-Modified"),
+        }
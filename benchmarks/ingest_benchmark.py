@@ -0,0 +1,102 @@
+"""Throughput benchmark for ingest_server.py.
+
+Starts the server on an ephemeral localhost port over a temporary store,
+then runs concurrent keep-alive clients that each POST their share of
+synthetic entries in small batches. Reports committed entries per second
+and checks that every entry reached the store exactly once.
+
+    python benchmarks/ingest_benchmark.py --entries 20000 --clients 16 --per-request 10
+"""
+import argparse
+import asyncio
+import json
+import os
+import shutil
+import sys
+import tempfile
+import time
+
+REPO_DIR = os.path.dirname(os.path.dirname(os.path.abspath(__file__)))
+if REPO_DIR not in sys.path:
+    sys.path.insert(0, REPO_DIR)
+
+from benchmarks.synthetic import synthetic_rows  # noqa: E402
+from ingest_server import IngestServer  # noqa: E402
+from storage import open_store  # noqa: E402
+
+
+async def _client(port, batches, latencies):
+    reader, writer = await asyncio.open_connection('127.0.0.1', port)
+    try:
+        for batch in batches:
+            body = json.dumps(batch).encode('utf-8')
+            start = time.perf_counter()
+            writer.write(f"POST /entries HTTP/1.1\r\nHost: localhost\r\nContent-Type: application/json\r\n"
+                         f"Content-Length: {len(body)}\r\n\r\n".encode('latin-1') + body)
+            await writer.drain()
+            status = (await reader.readline()).split()[1]
+            length = 0
+            while True:
+                line = await reader.readline()
+                if line in (b'\r\n', b''):
+                    break
+                if line.lower().startswith(b'content-length:'):
+                    length = int(line.split(b':', 1)[1])
+            await reader.readexactly(length)
+            if status != b'201':
+                raise RuntimeError(f"server answered {status.decode()}")
+            latencies.append((time.perf_counter() - start) * 1000)
+    finally:
+        writer.close()
+
+
+async def run(store_path, entries, clients, per_request, batch_size, max_delay):
+    rows = list(synthetic_rows(entries))
+    requests = [rows[i:i + per_request] for i in range(0, len(rows), per_request)]
+    store = open_store(store_path)
+    server = await IngestServer(store, batch_size, max_delay).start('127.0.0.1', 0)
+    latencies = []
+    try:
+        start = time.perf_counter()
+        await asyncio.gather(*(_client(server.port, requests[i::clients], latencies) for i in range(clients)))
+        elapsed = time.perf_counter() - start
+    finally:
+        await server.close()
+        store.close()
+    return elapsed, latencies, server.batches
+
+
+def main(argv=None):
+    parser = argparse.ArgumentParser(description="Measure ingestion server throughput on localhost.")
+    parser.add_argument('--entries', type=int, default=20000)
+    parser.add_argument('--clients', type=int, default=16)
+    parser.add_argument('--per-request', type=int, default=10, help="entries per POST")
+    parser.add_argument('--batch-size', type=int, default=1000, help="server group-commit size")
+    parser.add_argument('--max-delay-ms', type=float, default=5.0)
+    parser.add_argument('--store', choices=['csv', 'sqlite'], default='csv')
+    args = parser.parse_args(argv)
+
+    workdir = tempfile.mkdtemp(prefix='diary-ingest-')
+    try:
+        store_path = os.path.join(workdir, 'diary.db' if args.store == 'sqlite' else 'diary.csv')
+        elapsed, latencies, batches = asyncio.run(run(store_path, args.entries, args.clients, args.per_request,
+                                                      args.batch_size, args.max_delay_ms / 1000))
+        store = open_store(store_path)
+        stored = len(store.read_frame())
+        store.close()
+    finally:
+        shutil.rmtree(workdir, ignore_errors=True)
+
+    latencies.sort()
+    print(f"{args.entries} entries from {args.clients} clients in {elapsed:.2f} s "
+          f"({args.entries / elapsed:,.0f} entries/s, {batches} commits)")
+    print(f"request latency: median {latencies[len(latencies) // 2]:.1f} ms, "
+          f"p95 {latencies[int(0.95 * (len(latencies) - 1))]:.1f} ms")
+    if stored != args.entries:
+        print(f"ERROR: store holds {stored} entries, expected {args.entries}")
+        return 1
+    return 0
+
+
+if __name__ == "__main__":
+    sys.exit(main())
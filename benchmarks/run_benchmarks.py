@@ -0,0 +1,277 @@
+"""Benchmark suite for the save, load and plot paths.
+
+For each history size a synthetic diary is generated in a temporary
+directory and the following are timed:
+
+* save.*    -- CsvStore/SqliteStore appends and the whole save_data write
+               path (upsert + aggregate cache + search index update),
+* load.*    -- pandas.read_csv of the full file, the cold columnar cache
+               build and a warm projected load of the analytics columns,
+* plot.*    -- cold/warm aggregate cache, data preparation for the
+               dashboard and a headless (Agg) render of the figure,
+* history.* -- cold date index build and reading one page of the
+               history browser by location,
+* search.*  -- cold search index build, the first search (which loads
+               the postings) and warm queries: a common term, a prefix,
+               two terms and three terms,
+* window.*  -- DiaryWindow construction on the offscreen Qt platform.
+
+Results are written as JSON. With --baseline, medians are compared with a
+previous results file and the script exits 1 when any benchmark is slower
+by more than --tolerance.
+
+    python benchmarks/run_benchmarks.py --sizes 1000,10000,100000 --output results.json
+"""
+import argparse
+import io
+import json
+import os
+import platform
+import shutil
+import statistics
+import subprocess
+import sys
+import tempfile
+import time
+
+REPO_DIR = os.path.dirname(os.path.dirname(os.path.abspath(__file__)))
+if REPO_DIR not in sys.path:
+    sys.path.insert(0, REPO_DIR)
+
+from benchmarks.synthetic import synthetic_rows, write_csv  # noqa: E402
+
+DEFAULT_SIZES = [1000, 10000, 100000]
+DEFAULT_TOLERANCE = 0.25
+DEFAULT_MIN_DELTA_MS = 1.0  # ignore jitter on sub-millisecond benchmarks
+
+
+def timed(fn, runs, setup=None, warmup=0):
+    for _ in range(warmup):
+        if setup is not None:
+            setup()
+        fn()
+    samples = []
+    for _ in range(runs):
+        if setup is not None:
+            setup()
+        start = time.perf_counter()
+        fn()
+        samples.append((time.perf_counter() - start) * 1000)
+    return samples
+
+
+def _remove(*paths):
+    for path in paths:
+        if os.path.isdir(path):
+            shutil.rmtree(path)
+        elif os.path.exists(path):
+            os.remove(path)
+
+
+class Suite:
+
+    def __init__(self, runs):
+        self.runs = runs
+        self.results = []
+
+    def record(self, name, rows, samples):
+        result = {'name': name, 'rows': rows, 'runs': len(samples),
+                  'median_ms': round(statistics.median(samples), 3), 'min_ms': round(min(samples), 3)}
+        self.results.append(result)
+        print(f"{name:<28} {rows:>8} rows  median {result['median_ms']:>10.2f} ms  min {result['min_ms']:>10.2f} ms")
+
+    def run_size(self, workdir, rows):
+        import pandas as pd
+        from aggregates import AggregateCache, cache_path_for
+        from analytics import ANALYTICS_COLUMNS, compute_trends
+        from columnar import ColumnarCache, cache_dir_for
+        from date_index import DateIndex, index_path_for
+        from habits import HabitMatrix
+        from text_analytics import TextCache, cache_path_for as text_cache_path_for
+        from report import render_figure
+        from search_index import SearchIndex
+        from storage import CsvStore, SqliteStore, migrate_csv
+
+        csv_path = write_csv(os.path.join(workdir, f'diary_{rows}.csv'), rows)
+        store = CsvStore(csv_path)
+        extra_rows = list(synthetic_rows(self.runs, seed=rows + 1))
+
+        # --- Load path ---
+        self.record('load.read_csv', rows, timed(lambda: pd.read_csv(csv_path, on_bad_lines='skip'), self.runs))
+        columns_dir = cache_dir_for(csv_path)
+        self.record('load.columnar_build', rows,
+                    timed(lambda: ColumnarCache(store).refresh(), max(1, self.runs // 3),
+                          setup=lambda: _remove(columns_dir)))
+        self.record('load.columnar_projection', rows,
+                    timed(lambda: ColumnarCache(store).load_frame(ANALYTICS_COLUMNS), self.runs))
+
+        # --- Plot path ---
+        agg_path = cache_path_for(csv_path)
+        self.record('plot.aggregates_rebuild', rows,
+                    timed(lambda: AggregateCache(store).refresh(), max(1, self.runs // 3),
+                          setup=lambda: _remove(agg_path)))
+        self.record('plot.aggregates_warm', rows, timed(lambda: AggregateCache(store).refresh(), self.runs))
+        aggregates = AggregateCache(store)
+        aggregates.refresh()
+        columns = ColumnarCache(store)
+
+        def prepare():
+            aggregates.frame()
+            compute_trends(columns.load_frame(ANALYTICS_COLUMNS))
+        self.record('plot.prepare', rows, timed(prepare, self.runs))
+
+        frame = aggregates.frame()
+        habits = aggregates.habits()
+
+        def render():
+            fig = render_figure(frame, aggregates.activity_done, aggregates.total_days, habits)
+            fig.savefig(io.BytesIO(), format='png')
+        self.record('plot.render', rows, timed(render, max(1, self.runs // 2), warmup=1))
+
+        # --- Habits ---
+        self.record('habits.build', rows, timed(lambda: HabitMatrix.from_days(aggregates.days), self.runs))
+
+        def habit_queries():
+            habits.streaks()
+            habits.co_occurrence()
+            habits.weekly_heatmap()
+        self.record('habits.queries', rows, timed(habit_queries, self.runs))
+
+        # --- Text themes ---
+        text_path = text_cache_path_for(csv_path)
+        self.record('text.build', rows,
+                    timed(lambda: TextCache(store).refresh(), max(1, self.runs // 3),
+                          setup=lambda: _remove(text_path)))
+        text = TextCache(store)
+        text.refresh()
+        self.record('text.themes', rows, timed(text.themes, self.runs))
+
+        # --- History browser ---
+        dates_path = index_path_for(csv_path)
+        self.record('history.index_build', rows,
+                    timed(lambda: DateIndex(store).refresh(), max(1, self.runs // 3),
+                          setup=lambda: _remove(dates_path)))
+        entries = DateIndex(store)
+        entries.refresh()
+        self.record('history.page', rows, timed(lambda: entries.read(entries.dates[-100:]), self.runs))
+
+        # --- Search ---
+        search_path = os.path.splitext(csv_path)[0] + '.search.json'
+        self.record('search.index_build', rows,
+                    timed(lambda: SearchIndex(store).update(), max(1, self.runs // 3),
+                          setup=lambda: _remove(search_path)))
+        self.record('search.load', rows, timed(lambda: SearchIndex(store).search('coffee'), max(1, self.runs // 3)))
+        search = SearchIndex(store)
+        search.preload()
+        for name, query in (('term', 'coffee'), ('prefix', 'co'), ('two_terms', 'gym walk'), ('three_terms', 'deploy budget rain')):
+            self.record(f'search.{name}', rows, timed(lambda: search.search(query), self.runs))
+
+        # --- Save path (mutates the file, so it runs last) ---
+        pending = iter(extra_rows)
+
+        def save_path():
+            entries.upsert(next(pending))
+            aggregates.refresh()
+            search.update()
+        self.record('save.full_path', rows, timed(save_path, self.runs))
+        pending_csv = iter(synthetic_rows(self.runs, seed=rows + 2))
+        self.record('save.csv_append', rows, timed(lambda: store.append(next(pending_csv)), self.runs))
+
+        db_path = os.path.join(workdir, f'diary_{rows}.db')
+        migrate_csv(csv_path, db_path)
+        sqlite_store = SqliteStore(db_path)
+        pending_db = iter(synthetic_rows(self.runs, seed=rows + 3))
+        self.record('save.sqlite_append', rows, timed(lambda: sqlite_store.append(next(pending_db)), self.runs))
+        sqlite_store.close()
+
+        self.run_window(csv_path, rows)
+        _remove(csv_path, db_path, columns_dir, agg_path, aggregates.log.log_path, dates_path,
+                entries.log.log_path, text_path, text.log.log_path, search.path, search.log.log_path)
+
+    def run_window(self, csv_path, rows):
+        code = (
+            "import sys, time\n"
+            "from PyQt6.QtWidgets import QApplication\n"
+            "qt_app = QApplication(sys.argv[:1])\n"
+            "import app\n"
+            "samples = []\n"
+            "for _ in range(%d):\n"
+            "    start = time.perf_counter()\n"
+            "    window = app.DiaryWindow()\n"
+            "    samples.append((time.perf_counter() - start) * 1000)\n"
+            "    window.close(); window.deleteLater(); qt_app.processEvents()\n"
+            "print(','.join(map(str, samples)))\n" % self.runs
+        )
+        env = dict(os.environ, DIARY_STORE=csv_path, PYTHONPATH=REPO_DIR)
+        env.setdefault('QT_QPA_PLATFORM', 'offscreen')
+        try:
+            output = subprocess.run([sys.executable, '-c', code], cwd=REPO_DIR, env=env,
+                                    capture_output=True, text=True, check=True).stdout
+        except (OSError, subprocess.CalledProcessError) as e:
+            print(f"window.construct skipped: {e}")
+            return
+        samples = [float(v) for v in output.strip().splitlines()[-1].split(',')]
+        self.record('window.construct', rows, samples)
+
+
+def _git_commit():
+    try:
+        return subprocess.run(['git', 'rev-parse', '--short', 'HEAD'], cwd=REPO_DIR,
+                              capture_output=True, text=True, check=True).stdout.strip()
+    except (OSError, subprocess.CalledProcessError):
+        return None
+
+
+def compare(results, baseline, tolerance, min_delta_ms=DEFAULT_MIN_DELTA_MS):
+    previous = {(r['name'], r['rows']): r['median_ms'] for r in baseline.get('results', [])}
+    regressions = []
+    for result in results:
+        before = previous.get((result['name'], result['rows']))
+        if before and result['median_ms'] > max(before * (1 + tolerance), before + min_delta_ms):
+            regressions.append(f"{result['name']} @ {result['rows']} rows: "
+                               f"{before:.2f} ms -> {result['median_ms']:.2f} ms")
+    return regressions
+
+
+def main(argv=None):
+    parser = argparse.ArgumentParser(description="Benchmark the diary save, load and plot paths.")
+    parser.add_argument('--sizes', default=','.join(map(str, DEFAULT_SIZES)),
+                        help="comma-separated history sizes in rows")
+    parser.add_argument('--runs', type=int, default=7)
+    parser.add_argument('--output', help="write JSON results to this file")
+    parser.add_argument('--baseline', help="previous results file to compare against")
+    parser.add_argument('--tolerance', type=float, default=DEFAULT_TOLERANCE,
+                        help="allowed slowdown vs. the baseline (0.25 = 25%%)")
+    parser.add_argument('--min-delta-ms', type=float, default=DEFAULT_MIN_DELTA_MS,
+                        help="slowdowns smaller than this are never reported")
+    args = parser.parse_args(argv)
+
+    suite = Suite(args.runs)
+    workdir = tempfile.mkdtemp(prefix='diary-bench-')
+    try:
+        for rows in (int(size) for size in args.sizes.split(',')):
+            suite.run_size(workdir, rows)
+    finally:
+        shutil.rmtree(workdir, ignore_errors=True)
+
+    report = {
+        'meta': {'python': platform.python_version(), 'platform': platform.platform(),
+                 'commit': _git_commit(), 'runs': args.runs,
+                 'timestamp': time.strftime('%Y-%m-%dT%H:%M:%S')},
+        'results': suite.results,
+    }
+    if args.output:
+        with open(args.output, 'w', encoding='utf-8') as f:
+            json.dump(report, f, indent=2)
+
+    if args.baseline:
+        with open(args.baseline, 'r', encoding='utf-8') as f:
+            regressions = compare(suite.results, json.load(f), args.tolerance, args.min_delta_ms)
+        for line in regressions:
+            print(f"REGRESSION {line}")
+        return 1 if regressions else 0
+    return 0
+
+
+if __name__ == "__main__":
+    sys.exit(main())
@@ -0,0 +1,122 @@
+"""Startup benchmark for the diary app.
+
+Measures, in fresh interpreter processes:
+
+* import time of ``app`` and which heavy modules it pulled in, and
+* time-to-first-paint: from the first statement of the process (before
+  PyQt6 or app are imported) until the first paint event of a DiaryWindow.
+
+Each measurement is repeated and the median is compared against a budget;
+the script exits with status 1 when a budget is exceeded or a heavy module
+is imported eagerly, so it can gate CI.
+
+    python benchmarks/startup_benchmark.py [--runs 5] [--json results.json]
+"""
+import argparse
+import json
+import os
+import statistics
+import subprocess
+import sys
+
+REPO_DIR = os.path.dirname(os.path.dirname(os.path.abspath(__file__)))
+HEAVY_MODULES = ["pandas", "matplotlib", "requests", "numpy"]
+DEFAULT_MAX_IMPORT_MS = 400
+DEFAULT_MAX_FIRST_PAINT_MS = 1500
+
+IMPORT_PROBE = """
+import json, sys, time
+start = time.perf_counter()
+import app
+elapsed = time.perf_counter() - start
+print(json.dumps({"import_ms": elapsed * 1000,
+                  "heavy": [m for m in %r if m in sys.modules]}))
+""" % (HEAVY_MODULES,)
+
+PAINT_PROBE = """
+import time
+start = time.perf_counter()
+import json, sys
+from PyQt6.QtCore import QEvent, QObject, QTimer
+from PyQt6.QtWidgets import QApplication
+import app
+
+class FirstPaint(QObject):
+    def eventFilter(self, obj, event):
+        if event.type() == QEvent.Type.Paint and "paint_ms" not in result:
+            result["paint_ms"] = (time.perf_counter() - start) * 1000
+            QTimer.singleShot(0, qt_app.quit)
+        return False
+
+result = {}
+qt_app = QApplication(sys.argv[:1])
+window = app.DiaryWindow()
+window.centralWidget().installEventFilter(FirstPaint(window))
+window.show()
+QTimer.singleShot(10000, qt_app.quit)
+qt_app.exec()
+print(json.dumps(result))
+"""
+
+
+def _run_probe(code):
+    env = dict(os.environ)
+    env.setdefault("QT_QPA_PLATFORM", "offscreen")
+    env["PYTHONPATH"] = REPO_DIR + os.pathsep + env.get("PYTHONPATH", "")
+    output = subprocess.run([sys.executable, "-c", code], cwd=REPO_DIR, env=env,
+                            capture_output=True, text=True, check=True).stdout
+    return json.loads(output.strip().splitlines()[-1])
+
+
+def measure_import(runs):
+    samples = [_run_probe(IMPORT_PROBE) for _ in range(runs)]
+    heavy = sorted({name for sample in samples for name in sample["heavy"]})
+    return statistics.median(s["import_ms"] for s in samples), heavy
+
+
+def measure_first_paint(runs):
+    samples = []
+    for _ in range(runs):
+        sample = _run_probe(PAINT_PROBE)
+        if "paint_ms" in sample:
+            samples.append(sample["paint_ms"])
+    return statistics.median(samples) if samples else None
+
+
+def main(argv=None):
+    parser = argparse.ArgumentParser(description=__doc__.splitlines()[0])
+    parser.add_argument("--runs", type=int, default=5)
+    parser.add_argument("--max-import-ms", type=float, default=DEFAULT_MAX_IMPORT_MS)
+    parser.add_argument("--max-first-paint-ms", type=float, default=DEFAULT_MAX_FIRST_PAINT_MS)
+    parser.add_argument("--json", help="write results to this file")
+    args = parser.parse_args(argv)
+
+    import_ms, heavy = measure_import(args.runs)
+    paint_ms = measure_first_paint(args.runs)
+    results = {
+        "import_ms": round(import_ms, 1),
+        "first_paint_ms": None if paint_ms is None else round(paint_ms, 1),
+        "heavy_modules_at_import": heavy,
+        "budget": {"import_ms": args.max_import_ms, "first_paint_ms": args.max_first_paint_ms},
+    }
+
+    failures = []
+    if import_ms > args.max_import_ms:
+        failures.append(f"import took {import_ms:.1f} ms (budget {args.max_import_ms:.0f} ms)")
+    if heavy:
+        failures.append(f"heavy modules imported at startup: {', '.join(heavy)}")
+    if paint_ms is None:
+        failures.append("DiaryWindow never painted")
+    elif paint_ms > args.max_first_paint_ms:
+        failures.append(f"first paint after {paint_ms:.1f} ms (budget {args.max_first_paint_ms:.0f} ms)")
+    results["failures"] = failures
+
+    print(json.dumps(results, indent=2))
+    if args.json:
+        with open(args.json, "w", encoding="utf-8") as f:
+            json.dump(results, f, indent=2)
+    return 1 if failures else 0
+
+
+if __name__ == "__main__":
+    sys.exit(main())
@@ -0,0 +1,89 @@
+"""Synthetic diary generator for benchmarks.
+
+Produces realistic diary_data.csv files with all 28 columns: several years
+of dates, sometimes more than one entry per day, scores and stats with
+plausible distributions, and free text of varying length.
+
+    python benchmarks/synthetic.py OUTPUT.csv --rows 10000 [--seed 0]
+"""
+import argparse
+import csv
+import os
+import random
+import sys
+from datetime import date, timedelta
+
+REPO_DIR = os.path.dirname(os.path.dirname(os.path.abspath(__file__)))
+if REPO_DIR not in sys.path:
+    sys.path.insert(0, REPO_DIR)
+
+from schema import COLUMN_NAMES, COLUMN_TYPES  # noqa: E402
+
+WORDS = ("team meeting code review debug tests deploy coffee walk gym friends family call read book "
+         "study algorithms exam practice speaking class notes project deadline tired focus calm sleep "
+         "late early rain sunny lunch dinner budget shopping youtube social media scrolling plan "
+         "journal meditate run music movie cook clean travel bus traffic email report design idea").split()
+IMPORTANCE = ["important", "not important", "should not care"]
+ACTIVITY_RATES = {'Did_Coding': 0.6, 'Gate_Classes': 0.3, 'Speaking_Skills': 0.2, 'Workout': 0.45, 'Meditation': 0.25}
+TEXT_LENGTHS = {'Notes': (0, 60), 'Unhappy_Reason': (0, 25), 'Happy_Thing1': (1, 10), 'Happy_Thing2': (0, 10)}
+DEFAULT_TEXT_LENGTH = (0, 6)
+
+
+def _text(rng, low, high):
+    count = rng.randint(low, high)
+    return ' '.join(rng.choice(WORDS) for _ in range(count)).capitalize()
+
+
+def synthetic_rows(rows, seed=0, start=date(2015, 1, 1), repeat_rate=0.1):
+    """Yield ``rows`` entry dicts in date order; ~repeat_rate of days get a second entry."""
+    rng = random.Random(seed)
+    day = start
+    produced = 0
+    while produced < rows:
+        for _ in range(2 if rng.random() < repeat_rate else 1):
+            if produced >= rows:
+                break
+            row = {}
+            for name in COLUMN_NAMES:
+                dtype = COLUMN_TYPES[name]
+                if name == 'Date':
+                    row[name] = day.isoformat()
+                elif name == 'Unhappy_Importance':
+                    row[name] = rng.choice(IMPORTANCE)
+                elif dtype == "int":
+                    row[name] = rng.randint(1, 5)
+                elif dtype == "bool":
+                    row[name] = rng.random() < ACTIVITY_RATES[name]
+                elif name == 'Nap_Hours':
+                    row[name] = round(min(14.0, max(0.0, rng.gauss(6.5, 2.0))), 1)
+                elif name == 'Meals':
+                    row[name] = rng.randint(1, 5)
+                elif name == 'Money_Spent':
+                    row[name] = round(rng.expovariate(1 / 40), 2)
+                else:
+                    row[name] = _text(rng, *TEXT_LENGTHS.get(name, DEFAULT_TEXT_LENGTH))
+            yield row
+            produced += 1
+        day += timedelta(days=1)
+
+
+def write_csv(path, rows, seed=0):
+    with open(path, 'w', newline='', encoding='utf-8') as f:
+        writer = csv.DictWriter(f, fieldnames=COLUMN_NAMES, lineterminator='\n')
+        writer.writeheader()
+        writer.writerows(synthetic_rows(rows, seed))
+    return path
+
+
+def main(argv=None):
+    parser = argparse.ArgumentParser(description="Generate a synthetic diary CSV.")
+    parser.add_argument('output')
+    parser.add_argument('--rows', type=int, default=10000)
+    parser.add_argument('--seed', type=int, default=0)
+    args = parser.parse_args(argv)
+    write_csv(args.output, args.rows, args.seed)
+    print(f"Wrote {args.rows} entries to {args.output}")
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,157 @@
+"""Columnar sidecar cache of the diary store.
+
+Each column is kept in its own flat binary file in a ``<store>.cols``
+directory and opened with np.memmap, so loaders only touch the columns they
+ask for instead of parsing every free-text field of the CSV:
+
+* date columns as datetime64[D] (NaT for blanks),
+* int/float columns as float64 (NaN for blanks),
+* bool columns as uint8,
+* text columns as one UTF-8 blob plus an int64 array of end offsets.
+
+The manifest records the store signature, the read cursor and the row
+count. refresh() does nothing while the store is unchanged, appends only
+the new rows after a save, and rebuilds from scratch when the store was
+rewritten. Files may briefly be longer than the manifest says after an
+interrupted append; readers never look past the recorded row count.
+"""
+import json
+import os
+import shutil
+
+import numpy as np
+
+from schema import COLUMNS, COLUMN_TYPES, parse_value
+
+CACHE_VERSION = 1
+FIXED_DTYPES = {"date": np.dtype('datetime64[D]'), "int": np.dtype(np.float64),
+                "float": np.dtype(np.float64), "bool": np.dtype(np.uint8)}
+
+
+def cache_dir_for(store_path):
+    return os.path.splitext(store_path)[0] + '.cols'
+
+
+def _to_array(dtype, values):
+    if dtype == "date":
+        return np.array([v if v is not None else 'NaT' for v in values], dtype=FIXED_DTYPES["date"])
+    if dtype == "bool":
+        return np.array([bool(v) for v in values], dtype=np.uint8)
+    return np.array([np.nan if v is None else v for v in values], dtype=np.float64)
+
+
+class ColumnarCache:
+
+    def __init__(self, store, path=None):
+        self.store = store
+        self.path = path or cache_dir_for(store.path)
+        self.manifest = self._read_manifest()
+
+    def _read_manifest(self):
+        try:
+            with open(os.path.join(self.path, 'manifest.json'), 'r', encoding='utf-8') as f:
+                manifest = json.load(f)
+        except (OSError, ValueError):
+            return None
+        return manifest if manifest.get('version') == CACHE_VERSION else None
+
+    def _write_manifest(self):
+        target = os.path.join(self.path, 'manifest.json')
+        tmp_path = f"{target}.tmp{os.getpid()}"
+        with open(tmp_path, 'w', encoding='utf-8') as f:
+            json.dump(self.manifest, f)
+        os.replace(tmp_path, target)
+
+    @property
+    def rows(self):
+        return self.manifest['rows'] if self.manifest else 0
+
+    def refresh(self):
+        """Sync the cache with the store; returns True if it changed."""
+        signature = self.store.signature()
+        if self.manifest is not None and signature == self.manifest['source']:
+            return False
+        if signature is None:
+            rows, cursor, full = [], None, True
+        else:
+            rows, cursor, full = self.store.read_since(self.manifest['cursor'] if self.manifest else None)
+        if full or self.manifest is None:
+            self._reset()
+        self._append(rows)
+        self.manifest.update({'source': signature, 'cursor': cursor})
+        self._write_manifest()
+        return True
+
+    def _reset(self):
+        shutil.rmtree(self.path, ignore_errors=True)
+        os.makedirs(self.path)
+        self.manifest = {'version': CACHE_VERSION, 'source': None, 'cursor': None, 'rows': 0,
+                         'text_bytes': {name: 0 for name, dtype in COLUMNS if dtype == "text"}}
+
+    def _append(self, rows):
+        if not rows:
+            return
+        count = self.manifest['rows']
+        text_bytes = self.manifest['text_bytes']
+        for name, dtype in COLUMNS:
+            values = [parse_value(dtype, row.get(name)) for row in rows]
+            if dtype == "text":
+                encoded = [(v or '').encode('utf-8') for v in values]
+                ends = text_bytes[name] + np.cumsum([len(b) for b in encoded], dtype=np.int64)
+                self._append_file(f'{name}.txt', text_bytes[name], b''.join(encoded))
+                self._append_file(f'{name}.off', count * 8, ends.tobytes())
+                text_bytes[name] = int(ends[-1])
+            else:
+                array = _to_array(dtype, values)
+                self._append_file(f'{name}.bin', count * array.itemsize, array.tobytes())
+        self.manifest['rows'] = count + len(rows)
+
+    def _append_file(self, filename, committed_size, payload):
+        path = os.path.join(self.path, filename)
+        with open(path, 'ab') as f:
+            # Drop anything an interrupted append left past the committed end.
+            f.truncate(committed_size)
+            f.write(payload)
+
+    def _memmap(self, filename, dtype, count):
+        if count == 0:
+            return np.empty(0, dtype=dtype)
+        return np.memmap(os.path.join(self.path, filename), dtype=dtype, mode='r', shape=(count,))
+
+    def load(self, columns):
+        """Return {column: array} for just the requested columns.
+
+        Fixed-width columns are read-only memory maps; text columns are
+        decoded into object arrays.
+        """
+        rows = self.rows
+        result = {}
+        for name in columns:
+            dtype = COLUMN_TYPES[name]
+            if dtype != "text":
+                result[name] = self._memmap(f'{name}.bin', FIXED_DTYPES[dtype], rows)
+                continue
+            ends = self._memmap(f'{name}.off', np.int64, rows)
+            blob = self._memmap(f'{name}.txt', np.uint8, int(ends[-1]) if rows else 0)
+            starts = np.r_[0, ends[:-1]] if rows else ends
+            text = np.empty(rows, dtype=object)
+            for i, (start, end) in enumerate(zip(starts.tolist(), ends.tolist())):
+                text[i] = blob[start:end].tobytes().decode('utf-8')
+            result[name] = text
+        return result
+
+    def load_frame(self, columns):
+        import pandas as pd
+        data = self.load(columns)
+        df = pd.DataFrame({name: np.asarray(values) for name, values in data.items()}, columns=columns)
+        for name in columns:
+            if COLUMN_TYPES[name] == "bool":
+                df[name] = df[name].astype(bool)
+        return df
+
+
+def load_columns(store, columns):
+    """Refresh the sidecar cache of ``store`` and load ``columns`` as a DataFrame."""
+    cache = ColumnarCache(store)
+    cache.refresh()
+    return cache.load_frame(columns)
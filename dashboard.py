@@ -0,0 +1,105 @@
+"""Embedded dashboard panel for DiaryWindow.
+
+A single persistent FigureCanvasQTAgg hosts the DashboardFigure. The series
+artists are animated: a full draw caches the static background (axes, zone
+band, pies) and data-only updates restore that background and blit the
+series, so redraw cost does not grow with the history length.
+
+The Themes tab holds a second canvas with the text panels, filled by
+set_themes() when the text analysis finishes on a worker thread. It is
+only redrawn when its data changed and the tab is showing.
+"""
+from PyQt6.QtWidgets import QWidget, QVBoxLayout, QLabel, QTabWidget
+from matplotlib.backends.backend_qtagg import FigureCanvasQTAgg
+from matplotlib.figure import Figure
+
+from analytics import summary_lines
+from habits import habit_lines
+from instrument import span
+from charts import DashboardFigure, ThemesFigure
+from text_analytics import theme_lines
+
+
+class DashboardPanel(QWidget):
+
+    def __init__(self, parent=None):
+        super().__init__(parent)
+        self.figure = Figure(figsize=(10, 7.5))
+        self.canvas = FigureCanvasQTAgg(self.figure)
+        self.charts = DashboardFigure(self.figure)
+        for artist in self.charts.series_artists:
+            artist.set_animated(True)
+        self._background = None
+
+        self.canvas.mpl_connect('draw_event', self._on_draw)
+        self.canvas.mpl_connect('resize_event', self._on_resize)
+
+        self.themes_figure = Figure(figsize=(10, 7.5))
+        self.themes_canvas = FigureCanvasQTAgg(self.themes_figure)
+        self.themes = ThemesFigure(self.themes_figure)
+        self._themes_stale = False
+        self._summary = []
+        self._theme_summary = []
+
+        self.tabs = QTabWidget(self)
+        self.tabs.addTab(self.canvas, "Overview")
+        self.tabs.addTab(self.themes_canvas, "Themes")
+        self.tabs.currentChanged.connect(self._draw_themes_if_shown)
+
+        layout = QVBoxLayout(self)
+        layout.setContentsMargins(0, 0, 0, 0)
+        layout.addWidget(self.tabs)
+
+        self.summary_label = QLabel(self)
+        self.summary_label.setWordWrap(True)
+        self.summary_label.setObjectName("dashboardSummary")
+        layout.addWidget(self.summary_label)
+
+    def update_data(self, frame, activity_done, total_days, trends=None, habits=None):
+        self._summary = (summary_lines(trends) if trends is not None else []) + habit_lines(habits)
+        self._show_summary()
+        with span("dashboard.set_data"):
+            needs_full_draw = self.charts.set_data(frame, activity_done, total_days, trends, habits)
+            self.charts.resample()
+        if needs_full_draw or self._background is None:
+            with span("dashboard.draw"):
+                self.canvas.draw()
+        else:
+            with span("dashboard.blit"):
+                self._blit_series()
+
+    def set_themes(self, themes):
+        """Show a TextCache.themes() result, which arrives after update_data()."""
+        self._theme_summary = theme_lines(themes)
+        self._show_summary()
+        with span("dashboard.themes"):
+            self._themes_stale = self.themes.set_data(themes) or self._themes_stale
+            self._draw_themes_if_shown()
+
+    def _show_summary(self):
+        lines = self._summary + self._theme_summary
+        self.summary_label.setText("\n".join(lines))
+        self.summary_label.setVisible(bool(lines))
+
+    def _draw_themes_if_shown(self):
+        if self._themes_stale and self.tabs.currentWidget() is self.themes_canvas:
+            self._themes_stale = False
+            self.themes_canvas.draw_idle()
+
+    def _on_draw(self, event):
+        self._background = self.canvas.copy_from_bbox(self.figure.bbox)
+        self._draw_series()
+
+    def _on_resize(self, event):
+        # Decimation depends on the axes width in pixels; the resize
+        # triggers a full draw which repaints the resampled series.
+        self.charts.resample()
+
+    def _draw_series(self):
+        for artist in self.charts.series_artists:
+            self.figure.draw_artist(artist)
+
+    def _blit_series(self):
+        self.canvas.restore_region(self._background)
+        self._draw_series()
+        self.canvas.blit(self.figure.bbox)
@@ -0,0 +1,128 @@
+"""Date-keyed index over the diary store.
+
+The store stays append-only: upserting an entry appends a new row, and the
+row stored last for a date is that date's entry ("latest wins"), so every
+incremental cache built on read_since() sees edits as ordinary appends.
+DateIndex maps each date to the store location of its latest row:
+
+    index = DateIndex(store)
+    index.upsert(row)                              # O(1): one append
+    index.get('2024-05-01')                        # row dict or None
+    index.range('2024-05-01', '2024-05-31')        # dates, via bisect
+    index.read(dates)                              # rows, read by location
+
+The mapping is persisted as an append-only sidecar log (see sidecar.py)
+and refreshed from the rows appended since the last call, so the full
+history is never loaded to look up or browse a handful of entries.
+"""
+import bisect
+import os
+import threading
+
+from schema import parse_value
+from sidecar import SidecarLog
+
+CACHE_VERSION = 1
+
+
+def index_path_for(store_path):
+    return os.path.splitext(store_path)[0] + '.dates.json'
+
+
+class DateIndex:
+
+    def __init__(self, store, path=None):
+        self.store = store
+        self.path = path or index_path_for(store.path)
+        # The window saves on a writer thread while the history view reads.
+        self._lock = threading.RLock()
+        self.log = None
+        self.locations = {}
+        self.dates = []
+
+    @property
+    def loaded(self):
+        return self.log is not None
+
+    def _load(self):
+        self.log = SidecarLog(self.path, CACHE_VERSION)
+        for date, location in self.log.records():
+            self.locations[date] = location
+        self.dates = sorted(self.locations)
+
+    def _set(self, date, location):
+        if date not in self.locations:
+            if not self.dates or date > self.dates[-1]:
+                self.dates.append(date)
+            else:
+                bisect.insort(self.dates, date)
+        self.locations[date] = location
+
+    def refresh(self):
+        """Index rows appended to the store since the last refresh."""
+        with self._lock:
+            if self.log is None:
+                self._load()
+            signature = self.store.signature()
+            if signature is None or signature == self.log.source:
+                return False
+            entries, cursor, full = self.store.scan_since(self.log.cursor)
+            if full:
+                self.locations = {}
+                self.dates = []
+                self.log.reset()
+            records = []
+            for location, row in entries:
+                date = parse_value('date', row.get('Date'))
+                if date is not None:
+                    self._set(date, location)
+                    records.append([date, location])
+            try:
+                if self.log.needs_compaction(len(self.locations), len(records)):
+                    self.log.rewrite([[date, self.locations[date]] for date in self.dates], signature, cursor)
+                else:
+                    self.log.append(records, signature, cursor)
+            except OSError as e:
+                print(f"Could not save date index: {e}")
+            return True
+
+    def upsert(self, row):
+        """Store ``row`` as the entry for its date, replacing any earlier one."""
+        with self._lock:
+            if parse_value('date', row.get('Date')) is None:
+                raise ValueError("an entry needs a valid Date (YYYY-MM-DD)")
+            self.store.append(row)
+            # Only an index that is already in memory is kept current here; a
+            # cold one catches up on its next refresh().
+            if self.loaded:
+                self.refresh()
+
+    def __len__(self):
+        self.refresh()
+        return len(self.dates)
+
+    def __contains__(self, date):
+        self.refresh()
+        return date in self.locations
+
+    def get(self, date):
+        rows = self.read([date])
+        return rows[0] if rows else None
+
+    def range(self, start=None, end=None):
+        """Dates from ``start`` to ``end`` inclusive (ISO strings), ascending."""
+        with self._lock:
+            self.refresh()
+            lo = 0 if start is None else bisect.bisect_left(self.dates, start)
+            hi = len(self.dates) if end is None else bisect.bisect_right(self.dates, end)
+            return self.dates[lo:hi]
+
+    def read(self, dates):
+        """Latest rows for ``dates``; missing dates are left out."""
+        with self._lock:
+            self.refresh()
+            locations = [self.locations[date] for date in dates if date in self.locations]
+            if not locations:
+                return []
+            rows = self.store.read_rows(locations)
+            return [row for row in rows if row is not None]
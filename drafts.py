@@ -0,0 +1,141 @@
+"""Crash-recovery drafts and the background writer thread.
+
+DraftJournal debounces form edits and writes a compact snapshot of the
+edited fields to ``<store stem>.draft.json`` (temp file + os.replace, so
+a crash mid-write leaves the previous draft intact). Writes run on the
+journal's single-thread QThreadPool, which DiaryWindow also uses for the
+final save: tasks run strictly in submission order, so a draft written
+before a save can never land after the save has cleared it.
+
+    journal = DraftJournal(store.path, snapshot=form.edited_values, parent=window)
+    form.changed.connect(journal.schedule)
+    draft = journal.load()          # {'saved_at': ..., 'values': {...}} or None
+    snapshot = journal.flush()      # queue any pending edits first
+    journal.submit(save, entry, finished=on_saved, failed=on_error)
+                                    # callbacks run on the UI thread
+
+A save that succeeds removes the draft file itself (on the writer thread)
+and then calls journal.mark_saved(snapshot), so closing the window after
+saving does not write the saved entry back out as a draft.
+"""
+import json
+import os
+import time
+
+from PyQt6.QtCore import QObject, QRunnable, QThreadPool, QTimer, pyqtSignal
+
+DRAFT_VERSION = 1
+DEBOUNCE_MS = 800
+
+
+def draft_path_for(store_path):
+    return os.path.splitext(store_path)[0] + '.draft.json'
+
+
+def write_draft(path, values):
+    data = {'version': DRAFT_VERSION, 'saved_at': time.time(), 'values': values}
+    tmp_path = f"{path}.tmp{os.getpid()}"
+    with open(tmp_path, 'w', encoding='utf-8') as f:
+        json.dump(data, f, ensure_ascii=False, separators=(',', ':'))
+        f.flush()
+        os.fsync(f.fileno())
+    os.replace(tmp_path, path)
+
+
+def remove_draft(path):
+    try:
+        os.remove(path)
+    except FileNotFoundError:
+        pass
+
+
+class TaskSignals(QObject):
+    finished = pyqtSignal(object)
+    failed = pyqtSignal(object)
+
+
+class Task(QRunnable):
+    """Run ``fn(*args)`` on a pool thread and report back through signals."""
+
+    def __init__(self, fn, *args):
+        super().__init__()
+        self.fn = fn
+        self.args = args
+        self.signals = TaskSignals()
+
+    def run(self):
+        try:
+            result = self.fn(*self.args)
+        except Exception as e:
+            self.signals.failed.emit(e)
+        else:
+            self.signals.finished.emit(result)
+
+
+class DraftJournal(QObject):
+
+    def __init__(self, store_path, snapshot, parent=None, delay_ms=DEBOUNCE_MS):
+        super().__init__(parent)
+        self.path = draft_path_for(store_path)
+        self.snapshot = snapshot
+        self.pool = QThreadPool(self)
+        self.pool.setMaxThreadCount(1)
+        self._tasks = set()
+        self._last_written = None
+        self.timer = QTimer(self)
+        self.timer.setSingleShot(True)
+        self.timer.setInterval(delay_ms)
+        self.timer.timeout.connect(self.flush)
+
+    def submit(self, fn, *args, finished=None, failed=None):
+        """Queue ``fn(*args)`` on the writer thread.
+
+        ``finished`` gets the result and ``failed`` the exception, on the UI
+        thread. They are connected before the task starts, so a task that
+        completes at once cannot report back to nobody.
+        """
+        task = Task(fn, *args)
+        # Keep the Python wrapper alive until the task has reported back.
+        self._tasks.add(task)
+        task.signals.finished.connect(lambda _: self._tasks.discard(task))
+        task.signals.failed.connect(lambda _: self._tasks.discard(task))
+        if finished is not None:
+            task.signals.finished.connect(finished)
+        if failed is not None:
+            task.signals.failed.connect(failed)
+        self.pool.start(task)
+
+    def schedule(self):
+        """Note an edit; the draft is written once edits pause."""
+        self.timer.start()
+
+    def flush(self):
+        self.timer.stop()
+        values = self.snapshot()
+        if values == self._last_written:
+            return values
+        self._last_written = values
+        failed = lambda e: print(f"Could not write draft: {e}")
+        if values:
+            self.submit(write_draft, self.path, values, failed=failed)
+        else:
+            self.submit(remove_draft, self.path, failed=failed)
+        return values
+
+    def mark_saved(self, values):
+        """Record that the store now holds ``values`` and the save removed the draft."""
+        self._last_written = values
+
+    def load(self):
+        try:
+            with open(self.path, 'r', encoding='utf-8') as f:
+                data = json.load(f)
+        except (OSError, ValueError):
+            return None
+        if data.get('version') != DRAFT_VERSION or not data.get('values'):
+            return None
+        self._last_written = data['values']
+        return data
+
+    def wait(self, timeout_ms=2000):
+        return self.pool.waitForDone(timeout_ms)
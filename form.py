@@ -0,0 +1,254 @@
+"""Entry form built from the field definitions in schema.py.
+
+DiaryForm lays out one titled section per schema.SECTIONS entry and fills
+it with the widgets described by schema.FIELDS. Section titles are created
+up front; the field widgets of each section are built lazily, one section
+per event-loop turn after the window is shown (build_lazily), or all at
+once by ensure_built(), which values() and set_values() call first.
+``changed`` is emitted whenever the user edits any field.
+
+All widgets are styled by APP_STYLESHEET, applied once to the window,
+through object names and the "role" property instead of per-widget style
+sheets.
+"""
+from PyQt6.QtWidgets import (QButtonGroup, QCheckBox, QGridLayout, QHBoxLayout, QLabel, QLineEdit, QRadioButton,
+                             QSlider, QTextEdit, QVBoxLayout, QWidget)
+from PyQt6.QtCore import QObject, Qt, QTimer, pyqtSignal
+
+from instrument import span
+from schema import FIELDS, GROUPS, SECTIONS
+
+APP_STYLESHEET = """
+QLabel[role="title"] { font: bold 14pt 'Comic Sans MS'; color: #8B0000; }
+QLabel[role="subtitle"] { font: bold 12pt 'Comic Sans MS'; color: #8B0000; }
+QLabel[role="field"] { font: bold 10pt 'Comic Sans MS'; color: #006400; }
+QLineEdit, QTextEdit { font: 10pt 'Comic Sans MS'; color: #006666; background-color: rgba(255, 255, 255, 0.8); }
+QTextBrowser#searchResults { font: 9pt 'Comic Sans MS'; color: #333333; }
+QRadioButton { font: 10pt 'Comic Sans MS'; color: #800080; }
+QCheckBox { font: 12pt 'Comic Sans MS'; color: #800080; }
+QLabel#quote { font: italic 12pt 'Comic Sans MS'; color: #006666; padding: 5px; }
+QLabel#background { background-color: #F5D6BA; }
+QLabel#dashboardSummary { font: 10pt 'Comic Sans MS'; color: #333333; background-color: #F5D6BA; padding: 6px; }
+QPushButton#saveButton { background-color: green; color: white; font: 12pt 'Comic Sans MS'; }
+QPushButton#graphButton { background-color: blue; color: white; font: 12pt 'Comic Sans MS'; }
+QPushButton#historyButton { background-color: purple; color: white; font: 12pt 'Comic Sans MS'; }
+"""
+
+
+def styled_label(text, role, parent=None):
+    widget = QLabel(text, parent)
+    widget.setProperty("role", role)
+    return widget
+
+
+class ChoiceGroup(QWidget):
+    """Vertical radio buttons for a field with a fixed set of values."""
+
+    def __init__(self, choices, parent=None):
+        super().__init__(parent)
+        layout = QVBoxLayout(self)
+        layout.setContentsMargins(0, 0, 0, 0)
+        self.buttons = QButtonGroup(self)
+        self.values = []
+        for value, text in choices:
+            button = QRadioButton(text, self)
+            self.buttons.addButton(button, len(self.values))
+            self.values.append(value)
+            layout.addWidget(button)
+
+    def value(self):
+        checked = self.buttons.checkedId()
+        return self.values[checked] if checked >= 0 else ""
+
+    def setValue(self, value):
+        if value in self.values:
+            self.buttons.button(self.values.index(value)).setChecked(True)
+
+
+# --- Widget kinds: create(field, parent), get(widget), set(widget, value), change signal ---
+
+def _create_slider(field, parent):
+    widget = QSlider(Qt.Orientation.Horizontal, parent)
+    widget.setRange(*field.options.get("range", (1, 5)))
+    widget.setValue(field.options.get("default", widget.minimum()))
+    return widget
+
+
+def _set_slider(widget, value):
+    try:
+        widget.setValue(int(float(value)))
+    except (TypeError, ValueError):
+        pass
+
+
+def _create_line(field, parent):
+    widget = QLineEdit(parent)
+    if "placeholder" in field.options:
+        widget.setPlaceholderText(field.options["placeholder"])
+    return widget
+
+
+def _create_choice(field, parent):
+    widget = ChoiceGroup(field.options["choices"], parent)
+    widget.setValue(field.options.get("default", field.options["choices"][0][0]))
+    return widget
+
+
+WIDGET_KINDS = {
+    "slider": (_create_slider, lambda w: w.value(), _set_slider, lambda w: w.valueChanged),
+    "line": (_create_line, lambda w: w.text(), lambda w, v: w.setText("" if v is None else str(v)),
+             lambda w: w.textChanged),
+    "text": (lambda f, p: QTextEdit(p), lambda w: w.toPlainText().strip(),
+             lambda w, v: w.setPlainText("" if v is None else str(v)), lambda w: w.textChanged),
+    "choice": (_create_choice, lambda w: w.value(), lambda w, v: w.setValue(v), lambda w: w.buttons.buttonToggled),
+    "check": (lambda f, p: QCheckBox(f.label, p), lambda w: w.isChecked(), lambda w, v: w.setChecked(bool(v)),
+              lambda w: w.toggled),
+}
+
+
+class DiaryForm(QObject):
+    changed = pyqtSignal()
+
+    def __init__(self, parent, column_layouts):
+        """Add the section titles to ``column_layouts`` ({"left": layout, ...})."""
+        super().__init__(parent)
+        self.owner = parent
+        self._filling = False
+        self.fields = {field.column: field._replace(options=field.options or {})
+                       for field in FIELDS if field.section is not None}
+        self.widgets = {}
+        self._pending = []
+        for key, title, column, columns in SECTIONS:
+            layout = column_layouts[column]
+            layout.addWidget(styled_label(title, "title", parent))
+            body = QVBoxLayout()
+            body.setContentsMargins(0, 0, 0, 0)
+            layout.addLayout(body)
+            self._pending.append((key, columns, body))
+
+    @property
+    def built(self):
+        return not self._pending
+
+    def build_next(self):
+        """Build the widgets of the next unbuilt section; False once all are built."""
+        if not self._pending:
+            return False
+        key, columns, body = self._pending.pop(0)
+        with span("form.section", section=key):
+            self._build_section(columns, body)
+        return bool(self._pending)
+
+    def build_lazily(self):
+        """Build the remaining sections one per event-loop turn."""
+        if self.build_next():
+            QTimer.singleShot(0, self.build_lazily)
+
+    def ensure_built(self):
+        while self.build_next():
+            pass
+
+    def values(self):
+        """Return {column: value} for every field on the form."""
+        self.ensure_built()
+        return {column: WIDGET_KINDS[field.widget][1](self.widgets[column]) for column, field in self.fields.items()}
+
+    def default_values(self):
+        """The values of an untouched form."""
+        defaults = {}
+        for column, field in self.fields.items():
+            if field.widget == "slider":
+                defaults[column] = field.options.get("default", field.options.get("range", (1, 5))[0])
+            elif field.widget == "choice":
+                defaults[column] = field.options.get("default", field.options["choices"][0][0])
+            else:
+                defaults[column] = False if field.widget == "check" else ""
+        return defaults
+
+    def edited_values(self):
+        """Only the fields that differ from an untouched form."""
+        defaults = self.default_values()
+        return {column: value for column, value in self.values().items() if value != defaults[column]}
+
+    def set_values(self, row):
+        """Fill the form from ``row`` without emitting ``changed``."""
+        self.ensure_built()
+        self._filling = True
+        try:
+            for column, value in row.items():
+                field = self.fields.get(column)
+                if field is not None:
+                    WIDGET_KINDS[field.widget][2](self.widgets[column], value)
+        finally:
+            self._filling = False
+
+    def _on_edit(self, *args):
+        if not self._filling:
+            self.changed.emit()
+
+    # --- Layout ---
+
+    def _create(self, field):
+        create, _, _, signal = WIDGET_KINDS[field.widget]
+        widget = create(field, self.owner)
+        signal(widget).connect(self._on_edit)
+        if "max_width" in field.options:
+            widget.setMaximumWidth(field.options["max_width"])
+        if "max_height" in field.options:
+            widget.setMaximumHeight(field.options["max_height"])
+        self.widgets[field.column] = widget
+        return widget
+
+    def _caption(self, field):
+        if field.label is None or field.widget == "check":
+            return None
+        return styled_label(field.label, "field", self.owner)
+
+    def _build_section(self, columns, body):
+        fields = [self.fields[column] for column in columns]
+        i = 0
+        while i < len(fields):
+            field = fields[i]
+            if field.group is None:
+                self._add_single(body, field)
+                i += 1
+                continue
+            members = [field]
+            while i + len(members) < len(fields) and fields[i + len(members)].group == field.group:
+                members.append(fields[i + len(members)])
+            self._add_group(body, field.group, members)
+            i += len(members)
+
+    def _add_single(self, body, field):
+        caption = self._caption(field)
+        widget = self._create(field)
+        if caption is not None and field.options.get("inline"):
+            row = QHBoxLayout()
+            row.addWidget(caption)
+            row.addWidget(widget)
+            body.addLayout(row)
+            return
+        if caption is not None:
+            body.addWidget(caption)
+        body.addWidget(widget)
+
+    def _add_group(self, body, group, members):
+        title, layout, per_row = GROUPS[group]
+        if title:
+            body.addWidget(styled_label(title, "field", self.owner))
+        if layout == "column":
+            for field in members:
+                body.addWidget(self._create(field))
+            return
+        grid = QGridLayout()
+        grid.setVerticalSpacing(5)
+        captions = [self._caption(field) for field in members]
+        has_captions = any(caption is not None for caption in captions)
+        per_row = per_row or len(members)
+        for n, (field, caption) in enumerate(zip(members, captions)):
+            row, column = divmod(n, per_row)
+            row *= 2 if has_captions else 1
+            if caption is not None:
+                grid.addWidget(caption, row, column)
+            grid.addWidget(self._create(field), row + 1 if has_captions else row, column)
+        body.addLayout(grid)
@@ -0,0 +1,166 @@
+"""Habit streaks, co-occurrence and weekly heatmaps for the "Did Today" activities.
+
+HabitMatrix keeps one uint8 per calendar day: bit i is ACTIVITY_COLUMNS[i]
+and the top bit marks days that have an entry at all, so a day without an
+entry simply reads as "nothing done". The array is dense from the first to
+the last entry and grows in place, so AggregateCache keeps it current in
+O(1) per saved day, and every query is a few whole-array NumPy operations:
+
+    habits = aggregates.habits()
+    habits.streaks()                 # {'Workout': (current, longest), ...}
+    habits.co_occurrence()           # 5x5 counts of days both were done
+    habits.weekly_heatmap(26)        # (26, 7) share of habits done, Monday first
+"""
+from datetime import date
+
+import numpy as np
+
+from schema import ACTIVITY_COLUMNS
+
+RECORDED = 0x80
+HABIT_MASK = (1 << len(ACTIVITY_COLUMNS)) - 1
+POPCOUNT = np.array([bin(i).count('1') for i in range(256)], dtype=np.uint8)
+_SHIFTS = np.arange(len(ACTIVITY_COLUMNS), dtype=np.uint8)
+INITIAL_CAPACITY = 512
+
+
+def habit_label(name):
+    return name.replace('Did_', '').replace('_', ' ')
+
+
+def _ordinal(day):
+    return date.fromisoformat(day).toordinal()
+
+
+class HabitMatrix:
+
+    def __init__(self):
+        self.origin = None  # ordinal of the first day in the array
+        self.length = 0
+        self._bits = np.zeros(INITIAL_CAPACITY, dtype=np.uint8)
+
+    @classmethod
+    def from_days(cls, days):
+        """Build from AggregateCache.days (date -> [..., activity bits])."""
+        matrix = cls()
+        if days:
+            ordinals = np.fromiter((_ordinal(day) for day in days), dtype=np.int64, count=len(days))
+            bits = np.fromiter((values[-1] for values in days.values()), dtype=np.uint8, count=len(days))
+            matrix.origin = int(ordinals.min())
+            matrix.length = int(ordinals.max()) - matrix.origin + 1
+            matrix._bits = np.zeros(max(INITIAL_CAPACITY, 2 * matrix.length), dtype=np.uint8)
+            matrix._bits[ordinals - matrix.origin] = (bits & HABIT_MASK) | RECORDED
+        return matrix
+
+    def copy(self):
+        matrix = HabitMatrix()
+        matrix.origin = self.origin
+        matrix.length = self.length
+        matrix._bits = self._bits[:max(self.length, 1)].copy()
+        return matrix
+
+    def _resize(self, length, shift=0):
+        bits = np.zeros(max(INITIAL_CAPACITY, 2 * length), dtype=np.uint8)
+        bits[shift:shift + self.length] = self._bits[:self.length]
+        self._bits = bits
+
+    def set(self, day, bits):
+        """Record the activity bits of the entry for ``day`` (ISO date)."""
+        ordinal = _ordinal(day)
+        if self.origin is None:
+            self.origin = ordinal
+        elif ordinal < self.origin:
+            shift = self.origin - ordinal
+            self._resize(self.length + shift, shift)
+            self.origin = ordinal
+            self.length += shift
+        i = ordinal - self.origin
+        if i >= len(self._bits):
+            self._resize(i + 1)
+        self._bits[i] = (bits & HABIT_MASK) | RECORDED
+        self.length = max(self.length, i + 1)
+
+    @property
+    def bits(self):
+        """One uint8 per day from the first to the last entry."""
+        return self._bits[:self.length]
+
+    @property
+    def last_day(self):
+        return date.fromordinal(self.origin + self.length - 1).isoformat() if self.length else None
+
+    def done(self):
+        """(habits, days) 0/1 matrix, one row per ACTIVITY_COLUMNS entry."""
+        return (self.bits[None, :] >> _SHIFTS[:, None]) & 1
+
+    # --- Queries ---
+
+    def streaks(self, today=None):
+        """{habit: (current, longest)} in consecutive days.
+
+        The current streak is counted back from ``today`` (default: the
+        actual date) and is still alive if today has no tick yet but
+        yesterday did.
+        """
+        if not self.length:
+            return {name: (0, 0) for name in ACTIVITY_COLUMNS}
+        done = self.done().astype(np.int32)
+        total = np.cumsum(done, axis=1)
+        # Subtracting the running total at each habit's latest miss leaves
+        # the length of the run ending on every day.
+        runs = total - np.maximum.accumulate(total * (1 - done), axis=1)
+        longest = runs.max(axis=1)
+
+        end = (_ordinal(today) if today else date.today().toordinal()) - self.origin
+        on_end = runs[:, end] if 0 <= end < self.length else np.zeros_like(longest)
+        before_end = runs[:, end - 1] if 0 <= end - 1 < self.length else np.zeros_like(longest)
+        current = np.where(on_end > 0, on_end, before_end)
+        return {name: (int(c), int(m)) for name, c, m in zip(ACTIVITY_COLUMNS, current, longest)}
+
+    def co_occurrence(self):
+        """Days on which both habits were done; the diagonal is each habit's total."""
+        done = self.done().astype(np.int32)
+        return done @ done.T
+
+    def weekly_heatmap(self, weeks=26, end=None, habit=None):
+        """Share of habits done per day as a (weeks, 7) array, Monday first.
+
+        Rows run oldest to newest and finish with the week containing ``end``
+        (default: the last entry). Days without an entry are NaN. With
+        ``habit`` each cell is 0/1 for that habit alone.
+        """
+        cells = np.full(weeks * 7, np.nan)
+        if not self.length:
+            return cells.reshape(weeks, 7)
+        last = _ordinal(end) if end else self.origin + self.length - 1
+        start = last - date.fromordinal(last).weekday() - 7 * (weeks - 1)
+        lo = max(start, self.origin)
+        hi = min(start + 7 * weeks, self.origin + self.length)
+        if lo < hi:
+            bits = self._bits[lo - self.origin:hi - self.origin]
+            if habit is None:
+                values = POPCOUNT[bits & HABIT_MASK] / len(ACTIVITY_COLUMNS)
+            else:
+                values = (bits >> ACTIVITY_COLUMNS.index(habit)) & 1
+            cells[lo - start:hi - start] = np.where(bits & RECORDED, values, np.nan)
+        return cells.reshape(weeks, 7)
+
+
+def habit_lines(habits, today=None):
+    """Human-readable summaries of streaks and the habits most often done together."""
+    if habits is None or not habits.length:
+        return []
+    streaks = habits.streaks(today)
+    parts = [f"{habit_label(name)} {current}/{longest}" for name, (current, longest) in streaks.items()]
+    lines = ["Streaks (current/longest days): " + ', '.join(parts)]
+
+    counts = habits.co_occurrence()
+    totals = np.diag(counts)
+    either = totals[:, None] + totals[None, :] - counts
+    overlap = np.divide(counts, either, out=np.zeros(counts.shape), where=either > 0)
+    np.fill_diagonal(overlap, 0)
+    i, j = np.unravel_index(np.argmax(overlap), overlap.shape)
+    if overlap[i, j] > 0:
+        lines.append(f"Most often together: {habit_label(ACTIVITY_COLUMNS[i])} & "
+                     f"{habit_label(ACTIVITY_COLUMNS[j])} ({overlap[i, j]:.0%} of days with either)")
+    return lines
@@ -0,0 +1,174 @@
+"""History browser for past diary entries.
+
+HistoryModel lists the dates of a DateIndex newest first and only reports
+rows as the view scrolls to them (canFetchMore/fetchMore, one page at a
+time). Row contents are read from the store by location a page at a time
+and only a bounded number of pages is kept, so browsing years of entries
+never loads the whole diary. Edits are handed to a ``save`` callable that
+stores them off the UI thread (the app's writer, which also knows about an
+ingest server); a cell shows its new value once the save has completed.
+"""
+from collections import OrderedDict
+
+from PyQt6.QtWidgets import QHBoxLayout, QLabel, QLineEdit, QTableView, QVBoxLayout, QWidget
+from PyQt6.QtCore import QAbstractTableModel, QModelIndex, Qt, pyqtSignal
+
+from schema import COLUMN_NAMES, COLUMN_TYPES, parse_value
+
+PAGE_SIZE = 100
+MAX_CACHED_PAGES = 20
+
+
+class HistoryModel(QAbstractTableModel):
+    entry_changed = pyqtSignal(str)
+
+    def __init__(self, date_index, save, parent=None):
+        super().__init__(parent)
+        self.date_index = date_index
+        self.save = save
+        self._dates = []
+        self._shown = 0
+        self._pages = OrderedDict()
+
+    def reload(self, start=None, end=None):
+        """Show the entries from ``start`` to ``end`` (inclusive ISO dates)."""
+        self.beginResetModel()
+        self._dates = self.date_index.range(start, end)[::-1]
+        self._shown = 0
+        self._pages.clear()
+        self.endResetModel()
+
+    # --- Lazy population ---
+
+    def rowCount(self, parent=QModelIndex()):
+        return 0 if parent.isValid() else self._shown
+
+    def columnCount(self, parent=QModelIndex()):
+        return 0 if parent.isValid() else len(COLUMN_NAMES)
+
+    def canFetchMore(self, parent=QModelIndex()):
+        return not parent.isValid() and self._shown < len(self._dates)
+
+    def fetchMore(self, parent=QModelIndex()):
+        count = min(PAGE_SIZE, len(self._dates) - self._shown)
+        if parent.isValid() or count <= 0:
+            return
+        self.beginInsertRows(QModelIndex(), self._shown, self._shown + count - 1)
+        self._shown += count
+        self.endInsertRows()
+
+    def _row(self, i):
+        page = i // PAGE_SIZE
+        rows = self._pages.get(page)
+        if rows is None:
+            dates = self._dates[page * PAGE_SIZE:(page + 1) * PAGE_SIZE]
+            rows = {parse_value('date', row.get('Date')): row for row in self.date_index.read(dates)}
+            self._pages[page] = rows
+            if len(self._pages) > MAX_CACHED_PAGES:
+                self._pages.popitem(last=False)
+        else:
+            self._pages.move_to_end(page)
+        return rows.get(self._dates[i])
+
+    # --- Display and editing ---
+
+    def headerData(self, section, orientation, role=Qt.ItemDataRole.DisplayRole):
+        if role != Qt.ItemDataRole.DisplayRole:
+            return None
+        if orientation == Qt.Orientation.Horizontal:
+            return COLUMN_NAMES[section].replace('_', ' ')
+        return None
+
+    def data(self, index, role=Qt.ItemDataRole.DisplayRole):
+        if not index.isValid():
+            return None
+        row = self._row(index.row())
+        if row is None:
+            return None
+        name = COLUMN_NAMES[index.column()]
+        value = row.get(name)
+        if COLUMN_TYPES[name] == "bool":
+            if role == Qt.ItemDataRole.CheckStateRole:
+                return Qt.CheckState.Checked if parse_value('bool', value) else Qt.CheckState.Unchecked
+            return None
+        if role in (Qt.ItemDataRole.DisplayRole, Qt.ItemDataRole.EditRole):
+            if name == 'Date':
+                return self._dates[index.row()]
+            typed = parse_value(COLUMN_TYPES[name], value)
+            return "" if typed is None else str(typed)
+        return None
+
+    def flags(self, index):
+        flags = super().flags(index)
+        if not index.isValid() or index.column() == 0:
+            return flags
+        if COLUMN_TYPES[COLUMN_NAMES[index.column()]] == "bool":
+            return flags | Qt.ItemFlag.ItemIsUserCheckable
+        return flags | Qt.ItemFlag.ItemIsEditable
+
+    def setData(self, index, value, role=Qt.ItemDataRole.EditRole):
+        row = self._row(index.row()) if index.isValid() else None
+        if row is None:
+            return False
+        name = COLUMN_NAMES[index.column()]
+        dtype = COLUMN_TYPES[name]
+        if dtype == "bool":
+            if role != Qt.ItemDataRole.CheckStateRole:
+                return False
+            value = Qt.CheckState(value) == Qt.CheckState.Checked
+        elif role == Qt.ItemDataRole.EditRole:
+            value = str(value).strip()
+            if value and dtype != "text" and parse_value(dtype, value) is None:
+                return False
+        else:
+            return False
+
+        updated = dict(row)
+        updated[name] = value
+        i, date = index.row(), self._dates[index.row()]
+        self.save(updated, lambda _: self._saved(i, date, updated))
+        return True
+
+    def _saved(self, i, date, row):
+        # The table may have been reloaded while the save was queued; then
+        # the row is read back from the index when it is next shown.
+        if i < self._shown and self._dates[i] == date:
+            rows = self._pages.get(i // PAGE_SIZE)
+            if rows is not None:
+                rows[date] = row
+            self.dataChanged.emit(self.index(i, 0), self.index(i, len(COLUMN_NAMES) - 1))
+        self.entry_changed.emit(date)
+
+
+class HistoryPanel(QWidget):
+    """Table of past entries with an optional From/To date filter."""
+
+    def __init__(self, date_index, save, parent=None):
+        super().__init__(parent)
+        self.model = HistoryModel(date_index, save, self)
+        self.view = QTableView(self)
+        self.view.setModel(self.model)
+        self.view.setAlternatingRowColors(True)
+
+        self.start_entry = QLineEdit(self)
+        self.start_entry.setPlaceholderText("From YYYY-MM-DD")
+        self.end_entry = QLineEdit(self)
+        self.end_entry.setPlaceholderText("To YYYY-MM-DD")
+        for entry in (self.start_entry, self.end_entry):
+            entry.setMaximumWidth(160)
+            entry.editingFinished.connect(self.reload)
+
+        filter_row = QHBoxLayout()
+        filter_row.addWidget(QLabel("Show entries", self))
+        filter_row.addWidget(self.start_entry)
+        filter_row.addWidget(self.end_entry)
+        filter_row.addStretch(1)
+
+        layout = QVBoxLayout(self)
+        layout.addLayout(filter_row)
+        layout.addWidget(self.view)
+
+    def reload(self):
+        start = parse_value('date', self.start_entry.text())
+        end = parse_value('date', self.end_entry.text())
+        self.model.reload(start, end)
@@ -0,0 +1,366 @@
+"""Bulk import of external diary exports into the diary store.
+
+    python importer.py old_export.csv dump.jsonl ... [--store diary_data.csv]
+        [--on-conflict newest|oldest|merge] [--map "Mood=Happiness_Score"]
+        [--rejects rejects.jsonl] [--jobs N] [--dry-run]
+
+CSV files (any column order, header required) and JSON-lines files are
+parsed in a process pool, one task per file. A large JSON-lines file is
+also split into byte ranges at line boundaries, so it is spread over the
+cores too. CSV files are never split, because quoted fields may span
+lines. Workers stream their input, so memory stays bounded however big the
+files are. Only one merged record per date is kept.
+
+Header names are matched to the diary columns ignoring case, spaces and
+punctuation ("happiness score" -> Happiness_Score); --map adds explicit
+renames, and other columns are ignored. Every row goes through
+schema.validate_row, the same check the ingestion server applies, and rows
+that fail are written to the --rejects report (JSON lines with source,
+line, error and the raw row) instead of aborting the import.
+
+Entries for the same date, within the inputs or already in the diary, are
+resolved by --on-conflict. Inputs count in command-line order and the diary
+counts as older than any input:
+
+* newest -- the later entry replaces the earlier one (the store's own rule),
+* oldest -- the first entry is kept, so existing diary entries are untouched,
+* merge  -- fields are combined and later non-blank values win.
+
+The winners are appended to the store in date order in batches. Since the
+store is latest-wins, replacing an entry is just another append, and dates
+whose merged entry equals the stored one are not written again.
+"""
+import argparse
+import csv
+import json
+import os
+import re
+import sys
+import time
+from concurrent.futures import ProcessPoolExecutor
+
+from date_index import DateIndex
+from schema import COLUMN_NAMES, COLUMN_TYPES, parse_row, parse_value, validate_row
+from storage import default_store_path, open_store
+
+POLICIES = ('newest', 'oldest', 'merge')
+JSONL_SUFFIXES = ('.jsonl', '.ndjson', '.json')
+SPLIT_BYTES = 64 * 1024 * 1024
+BATCH_SIZE = 1000
+
+
+def normalize_name(name):
+    return re.sub(r'[^0-9a-z]+', '_', str(name).strip().lower()).strip('_')
+
+
+CANONICAL_NAMES = {normalize_name(name): name for name in COLUMN_NAMES}
+
+
+def column_mapping(names, renames=None):
+    """Map source column names to diary columns; returns (mapping, ignored names)."""
+    renames = {normalize_name(source): target for source, target in (renames or {}).items()}
+    mapping, ignored = {}, []
+    for name in names:
+        key = normalize_name(name)
+        target = renames.get(key) or CANONICAL_NAMES.get(key)
+        if target is None:
+            ignored.append(name)
+        else:
+            mapping[name] = target
+    return mapping, ignored
+
+
+def resolve(policy, older, newer):
+    """Combine two partial entries for the same date."""
+    if policy == 'newest':
+        return newer
+    if policy == 'oldest':
+        return older
+    return {**older, **newer}
+
+
+def full_row(entry):
+    """Expand a partial entry to every column, blanks as save_data writes them."""
+    return {name: entry.get(name, False if COLUMN_TYPES[name] == "bool" else "") for name in COLUMN_NAMES}
+
+
+def plan_tasks(paths, split_bytes=SPLIT_BYTES):
+    """Split the inputs into (path, kind, start, end) parse tasks, in input order."""
+    tasks = []
+    for path in paths:
+        kind = 'jsonl' if path.lower().endswith(JSONL_SUFFIXES) else 'csv'
+        try:
+            size = os.path.getsize(path)
+        except OSError:
+            # Planned whole, the task fails in its worker and the file is
+            # reported with its error like any other unreadable input.
+            size = None
+        if kind == 'csv' or size is None or size <= split_bytes:
+            tasks.append((path, kind, 0, None))
+            continue
+        for start in range(0, size, split_bytes):
+            tasks.append((path, kind, start, min(start + split_bytes, size)))
+    return tasks
+
+
+# --- Worker side ---
+
+def _csv_rows(path, result):
+    with open(path, 'r', newline='', encoding='utf-8-sig', errors='replace') as f:
+        reader = csv.reader(f)
+        header = next(reader, None)
+        if header is None:
+            return
+        result['columns'] = header
+        line = reader.line_num
+        for values in reader:
+            if len(values) != len(header):
+                yield line + 1, values, f"expected {len(header)} fields, got {len(values)}"
+            else:
+                yield line + 1, dict(zip(header, values)), None
+            line = reader.line_num
+
+
+def _jsonl_rows(path, start, end, result):
+    with open(path, 'rb') as f:
+        if start:
+            # Begin at the first line that starts inside the range; the
+            # previous task reads the line running across the boundary.
+            f.seek(start - 1)
+            f.readline()
+        line = 0
+        columns = {}
+        while end is None or f.tell() < end:
+            raw = f.readline()
+            if not raw:
+                break
+            line += 1
+            if not raw.strip():
+                continue
+            try:
+                entry = json.loads(raw)
+            except ValueError as e:
+                yield line, raw.decode('utf-8', 'replace').rstrip('\r\n'), f"invalid JSON: {e}"
+                continue
+            if not isinstance(entry, dict):
+                yield line, entry, "entry must be a JSON object"
+                continue
+            columns.update(dict.fromkeys(entry))
+            yield line, entry, None
+        result['lines'] = line
+        result['columns'] = list(columns)
+
+
+def parse_task(task, policy, renames=None, rejects_path=None):
+    """Parse one task in a worker process; returns a result dict.
+
+    ``entries`` holds one partial entry per date (only the fields the
+    source filled in), already resolved by ``policy`` within the task.
+    """
+    path, kind, start, end = task
+    started = time.perf_counter()
+    result = {'source': path, 'rows': 0, 'rejected': 0, 'duplicates': 0, 'lines': 0,
+              'entries': {}, 'ignored': [], 'rejects_path': None}
+    entries = result['entries']
+    rejects = None
+    mappings = {}
+    try:
+        rows = _csv_rows(path, result) if kind == 'csv' else _jsonl_rows(path, start, end, result)
+        for line, raw, error in rows:
+            result['rows'] += 1
+            entry = None
+            if error is None:
+                names = tuple(raw)
+                if names not in mappings:
+                    mappings[names] = column_mapping(names, renames)
+                mapping, _ = mappings[names]
+                mapped = {mapping[name]: value for name, value in raw.items() if name in mapping}
+                try:
+                    row = validate_row(mapped)
+                except ValueError as e:
+                    error = str(e)
+                else:
+                    entry = {name: row[name] for name, value in mapped.items()
+                             if value is not None and value != ""}
+                    entry['Date'] = row['Date']
+            if error is not None:
+                result['rejected'] += 1
+                if rejects_path:
+                    if rejects is None:
+                        rejects = open(rejects_path, 'w', encoding='utf-8')
+                        result['rejects_path'] = rejects_path
+                    rejects.write(json.dumps({'source': path, 'line': line, 'error': error, 'row': raw},
+                                             ensure_ascii=False, default=str) + '\n')
+                continue
+            date = entry['Date']
+            if date in entries:
+                result['duplicates'] += 1
+                entries[date] = resolve(policy, entries[date], entry)
+            else:
+                entries[date] = entry
+        if kind == 'csv':
+            result['lines'] = None
+        ignored = set()
+        for _, names in mappings.values():
+            ignored.update(names)
+        result['ignored'] = sorted(ignored)
+    except (OSError, UnicodeDecodeError, csv.Error) as e:
+        result['error'] = str(e)
+    finally:
+        if rejects is not None:
+            rejects.close()
+        result['seconds'] = time.perf_counter() - started
+    return result
+
+
+# --- Merge and write ---
+
+def _remove(path):
+    if path:
+        try:
+            os.remove(path)
+        except FileNotFoundError:
+            pass
+
+
+def _copy_rejects(result, line_base, report):
+    with open(result['rejects_path'], 'r', encoding='utf-8') as f:
+        for record in f:
+            if line_base:
+                record = json.loads(record)
+                record['line'] += line_base
+                record = json.dumps(record, ensure_ascii=False) + '\n'
+            report.write(record)
+    os.remove(result['rejects_path'])
+
+
+def import_files(paths, store, policy='newest', renames=None, rejects_path=None, jobs=None,
+                 dry_run=False, log=print, split_bytes=SPLIT_BYTES):
+    """Import ``paths`` into ``store``; returns a summary dict of counts."""
+    if policy not in POLICIES:
+        raise ValueError(f"unknown conflict policy '{policy}' (expected one of {', '.join(POLICIES)})")
+    start = time.perf_counter()
+    tasks = plan_tasks(paths, split_bytes)
+    summary = {'files': len(paths), 'rows': 0, 'rejected': 0, 'duplicates': 0, 'failed': 0}
+    merged = {}
+    report = open(rejects_path, 'w', encoding='utf-8') if rejects_path else None
+    try:
+        with ProcessPoolExecutor(max_workers=jobs) as pool:
+            futures = [pool.submit(parse_task, task, policy, renames,
+                                   f"{rejects_path}.part{i}" if rejects_path else None)
+                       for i, task in enumerate(tasks)]
+            # Results are merged in input order, so "newest" and "oldest"
+            # follow the command line however the workers finish.
+            line_bases = {}
+            for (path, _, task_start, _), future in zip(tasks, futures):
+                result = future.result()
+                line_base = line_bases.get(path, 0) if task_start else 0
+                if result['lines'] is not None:
+                    line_bases[path] = line_base + result['lines']
+                if 'error' in result:
+                    summary['failed'] += 1
+                    log(f"  failed  {path} ({result['error']})")
+                    _remove(result['rejects_path'])
+                    continue
+                if report is not None and result['rejects_path']:
+                    _copy_rejects(result, line_base, report)
+                for key in ('rows', 'rejected', 'duplicates'):
+                    summary[key] += result[key]
+                for date, entry in result['entries'].items():
+                    if date in merged:
+                        summary['duplicates'] += 1
+                        merged[date] = resolve(policy, merged[date], entry)
+                    else:
+                        merged[date] = entry
+                ignored = f"; ignored columns: {', '.join(result['ignored'])}" if result['ignored'] else ''
+                log(f"  parsed  {result['rows']:>9} rows  {result['rejected']:>7} rejected  "
+                    f"{result['seconds'] * 1000:8.1f} ms  {path}{ignored}")
+    finally:
+        if report is not None:
+            report.close()
+            # Parts of tasks that failed or never ran.
+            for i in range(len(tasks)):
+                _remove(f"{rejects_path}.part{i}")
+
+    summary.update(_write_entries(store, merged, policy, dry_run))
+    summary['seconds'] = time.perf_counter() - start
+    return summary
+
+
+def _write_entries(store, merged, policy, dry_run):
+    """Resolve ``merged`` against the diary and append the changed entries."""
+    index = DateIndex(store)
+    index.refresh()
+    counts = {'dates': len(merged), 'added': 0, 'replaced': 0, 'unchanged': 0}
+    dates = sorted(merged)
+    for i in range(0, len(dates), BATCH_SIZE):
+        batch_dates = dates[i:i + BATCH_SIZE]
+        existing = {parse_value('date', row.get('Date')): row
+                    for row in index.read([date for date in batch_dates if date in index])}
+        batch = []
+        for date in batch_dates:
+            entry = merged[date]
+            current = existing.get(date)
+            if current is None:
+                counts['added'] += 1
+                batch.append(full_row(entry))
+                continue
+            current_entry = {name: value for name, value in parse_row(current).items() if value is not None}
+            row = full_row(resolve(policy, current_entry, entry))
+            if parse_row(row) == parse_row(current):
+                counts['unchanged'] += 1
+            else:
+                counts['replaced'] += 1
+                batch.append(row)
+        if batch and not dry_run:
+            store.append_many(batch)
+    if not dry_run:
+        index.refresh()
+    return counts
+
+
+def _parse_renames(values):
+    renames = {}
+    for value in values or []:
+        source, sep, target = value.partition('=')
+        if not sep or target.strip() not in COLUMN_TYPES:
+            raise argparse.ArgumentTypeError(
+                f"--map expects SOURCE=COLUMN with a diary column, got '{value}'")
+        renames[source.strip()] = target.strip()
+    return renames
+
+
+def main(argv=None):
+    parser = argparse.ArgumentParser(description="Import CSV/JSON-lines diary exports into the diary store.")
+    parser.add_argument('sources', nargs='+', help="CSV or JSON-lines files, oldest first")
+    parser.add_argument('--store', default=None, help="diary to import into (default: $DIARY_STORE or diary_data.csv)")
+    parser.add_argument('--on-conflict', choices=POLICIES, default='newest',
+                        help="how to resolve several entries for one date (default: newest)")
+    parser.add_argument('--map', action='append', metavar='SOURCE=COLUMN', help="rename a source column")
+    parser.add_argument('--rejects', default=None, help="write rejected rows to this JSON-lines file")
+    parser.add_argument('-j', '--jobs', type=int, default=None, help="worker processes (default: all cores)")
+    parser.add_argument('--dry-run', action='store_true', help="report what would be imported without writing")
+    args = parser.parse_args(argv)
+    try:
+        renames = _parse_renames(args.map)
+    except argparse.ArgumentTypeError as e:
+        parser.error(str(e))
+
+    store = open_store(args.store or default_store_path())
+    try:
+        summary = import_files(args.sources, store, args.on_conflict, renames, args.rejects, args.jobs,
+                               args.dry_run)
+    finally:
+        store.close()
+    verb = "Would write" if args.dry_run else "Wrote"
+    print(f"{summary['rows']} rows from {summary['files']} files in {summary['seconds']:.2f} s: "
+          f"{summary['rejected']} rejected, {summary['duplicates']} duplicate dates merged.")
+    print(f"{verb} {summary['added']} new and {summary['replaced']} replaced entries to {store.path} "
+          f"({summary['unchanged']} already up to date).")
+    if summary['rejected'] and args.rejects:
+        print(f"Rejected rows are listed in {args.rejects}.")
+    return 1 if summary['failed'] else 0
+
+
+if __name__ == "__main__":
+    sys.exit(main())
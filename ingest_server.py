@@ -0,0 +1,243 @@
+"""Local HTTP/JSON ingestion service for diary entries.
+
+Scripts and other devices can log entries into the same store DiaryWindow
+uses without racing each other on the file: every request is validated
+against the schema and queued, and a single writer task group-commits the
+queued entries in batches (one store append per batch). A request is
+answered only after its entries are committed.
+
+    python ingest_server.py [--host 127.0.0.1] [--port 8765] [--store diary_data.csv]
+
+    POST /entries   a JSON object or a list of objects with the save_data fields
+                    -> 201 {"accepted": n} | 400 {"error": ...}
+    GET  /health    -> 200 {"status": "ok", "committed": n, "batches": n}
+
+DiaryWindow submits through the service when DIARY_INGEST_URL is set, e.g.
+``DIARY_INGEST_URL=http://127.0.0.1:8765``.
+"""
+import argparse
+import asyncio
+import json
+import sys
+import urllib.error
+import urllib.request
+from concurrent.futures import ThreadPoolExecutor
+
+from schema import validate_row
+from storage import default_store_path, open_store
+
+DEFAULT_HOST = '127.0.0.1'
+DEFAULT_PORT = 8765
+DEFAULT_BATCH_SIZE = 1000
+DEFAULT_MAX_DELAY = 0.005  # seconds without a new entry before a batch is committed
+MAX_BODY_BYTES = 8 * 1024 * 1024
+REASONS = {200: 'OK', 201: 'Created', 400: 'Bad Request', 404: 'Not Found', 405: 'Method Not Allowed',
+           411: 'Length Required', 413: 'Payload Too Large', 500: 'Internal Server Error'}
+
+
+class IngestServer:
+
+    def __init__(self, store, batch_size=DEFAULT_BATCH_SIZE, max_delay=DEFAULT_MAX_DELAY):
+        self.store = store
+        self.batch_size = batch_size
+        self.max_delay = max_delay
+        self.committed = 0
+        self.batches = 0
+        self._waiting = 0  # submit() calls not yet answered
+        self._queue = None
+        self._server = None
+        self._writer_task = None
+        # One thread, so appends to the store are strictly serialised.
+        self._executor = ThreadPoolExecutor(max_workers=1, thread_name_prefix='ingest-writer')
+
+    @property
+    def port(self):
+        return self._server.sockets[0].getsockname()[1]
+
+    async def start(self, host=DEFAULT_HOST, port=DEFAULT_PORT):
+        self._queue = asyncio.Queue()
+        self._writer_task = asyncio.create_task(self._write_batches())
+        self._server = await asyncio.start_server(self._handle_connection, host, port)
+        return self
+
+    async def serve_forever(self):
+        async with self._server:
+            await self._server.serve_forever()
+
+    async def close(self):
+        self._server.close()
+        await self._server.wait_closed()
+        await self._queue.join()
+        self._writer_task.cancel()
+        self._executor.shutdown(wait=True)
+
+    async def submit(self, rows):
+        """Queue validated rows and wait until they are committed."""
+        future = asyncio.get_running_loop().create_future()
+        self._waiting += 1
+        try:
+            await self._queue.put((rows, future))
+            return await future
+        finally:
+            self._waiting -= 1
+
+    async def _write_batches(self):
+        loop = asyncio.get_running_loop()
+        while True:
+            pending = [await self._queue.get()]
+            size = len(pending[0][0])
+            # Group-commit: keep collecting until the batch is full, every
+            # request waiting to be answered is in it (nothing else can
+            # arrive before one of them is answered), or no entry has
+            # arrived for max_delay.
+            while size < self.batch_size and len(pending) < self._waiting:
+                try:
+                    item = await asyncio.wait_for(self._queue.get(), self.max_delay)
+                except asyncio.TimeoutError:
+                    break
+                pending.append(item)
+                size += len(item[0])
+
+            batch = [row for rows, _ in pending for row in rows]
+            try:
+                await loop.run_in_executor(self._executor, self.store.append_many, batch)
+            except Exception as e:
+                for _, future in pending:
+                    if not future.done():
+                        future.set_exception(e)
+            else:
+                self.committed += len(batch)
+                self.batches += 1
+                for rows, future in pending:
+                    if not future.done():
+                        future.set_result(len(rows))
+            finally:
+                for _ in pending:
+                    self._queue.task_done()
+
+    async def _handle_connection(self, reader, writer):
+        try:
+            while True:
+                request_line = await reader.readline()
+                if not request_line:
+                    break
+                method, path, version = (request_line.decode('latin-1').split() + ['', '', ''])[:3]
+                headers = {}
+                while True:
+                    line = await reader.readline()
+                    if line in (b'\r\n', b'\n', b''):
+                        break
+                    name, _, value = line.decode('latin-1').partition(':')
+                    headers[name.strip().lower()] = value.strip()
+
+                body = b''
+                status, payload = None, None
+                if 'content-length' in headers:
+                    length = int(headers['content-length'])
+                    if length > MAX_BODY_BYTES:
+                        status, payload = 413, {'error': 'request body too large'}
+                    else:
+                        body = await reader.readexactly(length)
+                if status is None:
+                    status, payload = await self._route(method, path, headers, body)
+
+                keep_alive = (version == 'HTTP/1.1' and headers.get('connection', '').lower() != 'close'
+                              and status != 413)
+                data = json.dumps(payload).encode('utf-8')
+                writer.write(f"HTTP/1.1 {status} {REASONS.get(status, '')}\r\n"
+                             f"Content-Type: application/json\r\nContent-Length: {len(data)}\r\n"
+                             f"Connection: {'keep-alive' if keep_alive else 'close'}\r\n\r\n".encode('latin-1') + data)
+                await writer.drain()
+                if not keep_alive:
+                    break
+        except (asyncio.IncompleteReadError, ConnectionError, ValueError):
+            pass
+        finally:
+            writer.close()
+
+    async def _route(self, method, path, headers, body):
+        path = path.split('?', 1)[0]
+        if path == '/health':
+            if method != 'GET':
+                return 405, {'error': 'use GET'}
+            return 200, {'status': 'ok', 'committed': self.committed, 'batches': self.batches}
+        if path != '/entries':
+            return 404, {'error': 'not found'}
+        if method != 'POST':
+            return 405, {'error': 'use POST'}
+        if 'content-length' not in headers:
+            return 411, {'error': 'Content-Length required'}
+
+        try:
+            entries = json.loads(body.decode('utf-8'))
+        except (UnicodeDecodeError, ValueError) as e:
+            return 400, {'error': f'invalid JSON: {e}'}
+        if isinstance(entries, dict):
+            entries = [entries]
+        if not isinstance(entries, list) or not entries:
+            return 400, {'error': 'expected an entry object or a non-empty list of entries'}
+
+        rows = []
+        errors = []
+        for i, entry in enumerate(entries):
+            try:
+                rows.append(validate_row(entry))
+            except ValueError as e:
+                errors.append({'index': i, 'error': str(e)})
+        if errors:
+            # Reject the whole request so clients never have to work out
+            # which half of a batch was stored.
+            return 400, {'error': 'validation failed', 'details': errors}
+
+        try:
+            accepted = await self.submit(rows)
+        except Exception as e:
+            return 500, {'error': f'could not store entries: {e}'}
+        return 201, {'accepted': accepted}
+
+
+def submit_entries(url, entries, timeout=10):
+    """POST entries to an ingestion server; raises on any non-2xx response."""
+    data = json.dumps(entries).encode('utf-8')
+    request = urllib.request.Request(url.rstrip('/') + '/entries', data=data, method='POST',
+                                     headers={'Content-Type': 'application/json'})
+    try:
+        with urllib.request.urlopen(request, timeout=timeout) as response:
+            return json.loads(response.read().decode('utf-8'))['accepted']
+    except urllib.error.HTTPError as e:
+        try:
+            detail = json.loads(e.read().decode('utf-8'))
+        except ValueError:
+            detail = {'error': e.reason}
+        problems = [f"entry {d['index'] + 1}: {d['error']}" for d in detail.get('details', [])]
+        raise ValueError("; ".join(problems) or detail.get('error')) from None
+
+
+async def _main(args):
+    store = open_store(args.store)
+    server = await IngestServer(store, args.batch_size, args.max_delay_ms / 1000).start(args.host, args.port)
+    print(f"Ingesting into {store.path} on http://{args.host}:{server.port}")
+    try:
+        await server.serve_forever()
+    finally:
+        await server.close()
+        store.close()
+
+
+def main(argv=None):
+    parser = argparse.ArgumentParser(description="Local HTTP/JSON ingestion service for diary entries.")
+    parser.add_argument('--host', default=DEFAULT_HOST)
+    parser.add_argument('--port', type=int, default=DEFAULT_PORT)
+    parser.add_argument('--store', default=default_store_path())
+    parser.add_argument('--batch-size', type=int, default=DEFAULT_BATCH_SIZE)
+    parser.add_argument('--max-delay-ms', type=float, default=DEFAULT_MAX_DELAY * 1000)
+    args = parser.parse_args(argv)
+    try:
+        asyncio.run(_main(args))
+    except KeyboardInterrupt:
+        pass
+    return 0
+
+
+if __name__ == "__main__":
+    sys.exit(main())
@@ -0,0 +1,132 @@
+"""Lightweight hot-path instrumentation.
+
+Tracing is off by default and costs one attribute check per span. Enable
+it with the DIARY_TRACE environment variable or ``python app.py --trace
+PATH``; the collected spans and counters are written to PATH as a Chrome
+trace (open it in chrome://tracing or https://ui.perfetto.dev) when the
+process exits.
+
+    with span("save.append"):
+        ...
+    count("rows_read", len(rows))
+
+summary_lines() reports per-span statistics over a rolling window of the
+most recent calls, for display inside the app.
+"""
+import atexit
+import json
+import os
+import threading
+import time
+from collections import defaultdict, deque
+from contextlib import contextmanager
+
+ENV_VAR = 'DIARY_TRACE'
+ROLLING_WINDOW = 50
+
+_lock = threading.Lock()
+_enabled = False
+_trace_path = None
+_events = []
+_counters = defaultdict(float)
+_recent = defaultdict(lambda: deque(maxlen=ROLLING_WINDOW))
+_origin = time.perf_counter()
+
+
+def _now_us():
+    return (time.perf_counter() - _origin) * 1e6
+
+
+def enabled():
+    return _enabled
+
+
+def enable(path=None):
+    """Start recording; the trace is exported to ``path`` at exit if given.
+
+    Without a path no trace events are kept, only the counters and the
+    rolling per-span samples summary_lines() reports.
+    """
+    global _enabled, _trace_path
+    with _lock:
+        if path and _trace_path is None:
+            atexit.register(lambda: export(path))
+        _trace_path = path or _trace_path
+        _enabled = True
+
+
+def enable_from_env():
+    path = os.environ.get(ENV_VAR)
+    if path:
+        enable(path)
+
+
+@contextmanager
+def _recording_span(name, args):
+    start = _now_us()
+    try:
+        yield
+    finally:
+        end = _now_us()
+        event = {'name': name, 'ph': 'X', 'ts': start, 'dur': end - start,
+                 'pid': os.getpid(), 'tid': threading.get_ident()}
+        if args:
+            event['args'] = args
+        with _lock:
+            if _trace_path is not None:
+                _events.append(event)
+            _recent[name].append((end - start) / 1000)
+
+
+@contextmanager
+def _null_span():
+    yield
+
+
+def span(name, **args):
+    """Time the enclosed block as a named span (no-op while tracing is off)."""
+    if not _enabled:
+        return _null_span()
+    return _recording_span(name, args)
+
+
+def count(name, value=1):
+    """Add ``value`` to a named counter (rows read, bytes written, ...)."""
+    if not _enabled:
+        return
+    with _lock:
+        _counters[name] += value
+        if _trace_path is not None:
+            _events.append({'name': name, 'ph': 'C', 'ts': _now_us(), 'pid': os.getpid(),
+                        'tid': threading.get_ident(), 'args': {name: _counters[name]}})
+
+
+def counters():
+    with _lock:
+        return dict(_counters)
+
+
+def summary_lines(names=None):
+    """Per-span 'name: n calls, mean/p95/last ms' lines over the rolling window."""
+    with _lock:
+        recent = {name: list(samples) for name, samples in _recent.items()
+                  if names is None or name in names}
+    lines = []
+    for name in sorted(recent):
+        samples = recent[name]
+        ordered = sorted(samples)
+        p95 = ordered[min(len(ordered) - 1, int(round(0.95 * (len(ordered) - 1))))]
+        lines.append(f"{name}: {len(samples)} calls, mean {sum(samples) / len(samples):.1f} ms, "
+                     f"p95 {p95:.1f} ms, last {samples[-1]:.1f} ms")
+    return lines
+
+
+def export(path):
+    """Write everything recorded so far as a Chrome trace JSON file."""
+    with _lock:
+        data = {'traceEvents': list(_events), 'displayTimeUnit': 'ms',
+                'otherData': {'counters': dict(_counters)}}
+    tmp_path = f"{path}.tmp{os.getpid()}"
+    with open(tmp_path, 'w', encoding='utf-8') as f:
+        json.dump(data, f)
+    os.replace(tmp_path, path)
@@ -0,0 +1,166 @@
+"""Quote of the Day from a memory-mapped quote corpus.
+
+A corpus is a single binary file built from plain text (one quote per
+line) by this module's command line:
+
+    python quotes.py build quotes_en.txt -o quotes.bin [--seed N]
+    python quotes.py show [--date 2024-05-01] [--corpus quotes.bin]
+
+Layout: a 32-byte header (magic, quote count, seed, index offset), the
+UTF-8 quote bytes, then count + 1 little-endian uint64 offsets. Looking a
+quote up maps the file and reads two offsets and one quote, so startup
+costs the same for ten quotes or a million and nothing else is paged in.
+
+The quote for a date is ``(a * ordinal + seed) % count`` with ``a``
+coprime to ``count``. That affine map is a permutation of the corpus, so
+consecutive days never repeat a quote until every quote has been shown.
+
+The app reads ``quotes.bin`` next to this module, or the corpus named by
+DIARY_QUOTES, and falls back to a placeholder when there is none.
+"""
+import argparse
+import math
+import mmap
+import os
+import struct
+import sys
+from datetime import date
+
+APP_DIR = os.path.dirname(os.path.abspath(__file__))
+DEFAULT_CORPUS = os.path.join(APP_DIR, 'quotes.bin')
+ENV_VAR = 'DIARY_QUOTES'
+MAGIC = b'DQUOTES1'
+HEADER = struct.Struct('<8sQQQ')  # magic, count, seed, index offset
+OFFSET = struct.Struct('<Q')
+OFFSET_PAIR = struct.Struct('<QQ')
+DEFAULT_SEED = 0
+
+
+def default_corpus_path():
+    return os.environ.get(ENV_VAR, DEFAULT_CORPUS)
+
+
+def placeholder_quote(day):
+    return f"Quote of the Day {day.timetuple().tm_yday}: Keep shining!"
+
+
+def multiplier_for(count):
+    """A step coprime to ``count``, so stepping through the corpus visits every quote."""
+    step = max(1, int(count * 0.6180339887)) | 1
+    while math.gcd(step, count) != 1:
+        step += 1
+    return step
+
+
+class QuoteCorpus:
+
+    def __init__(self, path):
+        self.path = path
+        with open(path, 'rb') as f:
+            self._map = mmap.mmap(f.fileno(), 0, access=mmap.ACCESS_READ)
+        try:
+            if len(self._map) < HEADER.size:
+                raise ValueError(f"{path} is not a quote corpus")
+            magic, self.count, self.seed, self.index_offset = HEADER.unpack_from(self._map, 0)
+            if magic != MAGIC or self.index_offset + OFFSET.size * (self.count + 1) > len(self._map):
+                raise ValueError(f"{path} is not a quote corpus (rebuild it with 'python quotes.py build')")
+        except ValueError:
+            self._map.close()
+            raise
+        self.step = multiplier_for(self.count) if self.count else 1
+
+    def __len__(self):
+        return self.count
+
+    def __getitem__(self, i):
+        if not 0 <= i < self.count:
+            raise IndexError(i)
+        start, end = OFFSET_PAIR.unpack_from(self._map, self.index_offset + OFFSET.size * i)
+        return self._map[start:end].decode('utf-8')
+
+    def index_for(self, day):
+        return (self.step * day.toordinal() + self.seed) % self.count
+
+    def for_date(self, day=None):
+        """The quote for ``day`` (default: today), or None for an empty corpus."""
+        if not self.count:
+            return None
+        return self[self.index_for(day or date.today())]
+
+    def close(self):
+        self._map.close()
+
+    def __enter__(self):
+        return self
+
+    def __exit__(self, *exc):
+        self.close()
+
+
+def quote_of_the_day(day=None, path=None):
+    """Today's quote from the corpus, or the placeholder if there is no usable corpus."""
+    day = day or date.today()
+    path = path or default_corpus_path()
+    try:
+        with QuoteCorpus(path) as corpus:
+            quote = corpus.for_date(day)
+    except FileNotFoundError:
+        quote = None
+    except (OSError, ValueError) as e:
+        print(f"Could not read quotes from {path}: {e}")
+        quote = None
+    return quote or placeholder_quote(day)
+
+
+def build_corpus(lines, output_path, seed=DEFAULT_SEED):
+    """Write the non-blank ``lines`` to a corpus at ``output_path``; returns the quote count.
+
+    Quotes are streamed to disk and only their offsets are kept in memory.
+    """
+    offsets = [HEADER.size]
+    tmp_path = f"{output_path}.tmp{os.getpid()}"
+    with open(tmp_path, 'wb') as f:
+        f.write(bytes(HEADER.size))
+        position = HEADER.size
+        for line in lines:
+            quote = line.strip()
+            if not quote:
+                continue
+            data = quote.encode('utf-8')
+            f.write(data)
+            position += len(data)
+            offsets.append(position)
+        count = len(offsets) - 1
+        f.write(struct.pack(f'<{len(offsets)}Q', *offsets))
+        f.seek(0)
+        f.write(HEADER.pack(MAGIC, count, seed, position))
+    os.replace(tmp_path, output_path)
+    return count
+
+
+def main(argv=None):
+    parser = argparse.ArgumentParser(description="Build and inspect Quote of the Day corpora.")
+    commands = parser.add_subparsers(dest='command', required=True)
+    build = commands.add_parser('build', help="build a corpus from a text file with one quote per line")
+    build.add_argument('source', help="UTF-8 text file, or - for stdin")
+    build.add_argument('-o', '--output', default=DEFAULT_CORPUS)
+    build.add_argument('--seed', type=int, default=DEFAULT_SEED,
+                       help="shifts which quote falls on which date")
+    show = commands.add_parser('show', help="print the quote for a date")
+    show.add_argument('--date', type=date.fromisoformat, default=None, help="YYYY-MM-DD (default: today)")
+    show.add_argument('--corpus', default=None, help=f"corpus file (default: ${ENV_VAR} or {DEFAULT_CORPUS})")
+    args = parser.parse_args(argv)
+
+    if args.command == 'build':
+        if args.source == '-':
+            count = build_corpus(sys.stdin, args.output, args.seed)
+        else:
+            with open(args.source, 'r', encoding='utf-8') as f:
+                count = build_corpus(f, args.output, args.seed)
+        print(f"Wrote {count} quotes to {args.output}")
+    else:
+        print(quote_of_the_day(args.date, args.corpus))
+
+
+if __name__ == "__main__":
+    main()
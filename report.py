@@ -0,0 +1,203 @@
+"""Headless dashboard reports.
+
+Renders the same dashboard the app shows (trends, nap hours, activity
+pies and habit heatmaps) to PNG or PDF with the Agg canvas, so no
+display is needed:
+
+    python report.py DIARY_DIR [-o reports] [--format png|pdf] [--jobs N]
+
+Every ``*.csv`` (and ``*.db``) diary under DIARY_DIR is rendered in a
+process pool. A manifest in the output directory records the content hash
+of each input (with its write-ahead log for SQLite), so unchanged diaries
+are skipped on the next run, and the aggregate caches kept next to the
+manifest mean a grown diary only has its new rows parsed. SQLite files
+without a diary table are opened read-only and left alone.
+"""
+import argparse
+import fnmatch
+import hashlib
+import json
+import os
+import pathlib
+import sqlite3
+import sys
+import time
+from concurrent.futures import ProcessPoolExecutor, as_completed
+
+from aggregates import AggregateCache
+from storage import SQLITE_SUFFIXES, open_store
+
+MANIFEST_NAME = 'report_manifest.json'
+CACHE_DIR_NAME = '.cache'
+DEFAULT_PATTERNS = ['*.csv'] + [f'*{suffix}' for suffix in SQLITE_SUFFIXES]
+FIGURE_SIZE = (12, 9)
+DPI = 100
+
+
+def render_figure(frame, activity_done, total_days, habits=None):
+    """Build an Agg-backed dashboard Figure for the given series, counts and habits."""
+    from matplotlib.backends.backend_agg import FigureCanvasAgg
+    from matplotlib.figure import Figure
+    from charts import DashboardFigure
+
+    fig = Figure(figsize=FIGURE_SIZE, dpi=DPI)
+    FigureCanvasAgg(fig)
+    charts = DashboardFigure(fig)
+    charts.set_data(frame, activity_done, total_days, habits=habits)
+    charts.resample()
+    return fig
+
+
+def file_hash(path, chunk_size=1 << 20):
+    digest = hashlib.sha256()
+    # Committed SQLite writes sit in the -wal file until a checkpoint, so
+    # the main file alone can stay the same while the data changes.
+    paths = [path, path + '-wal'] if path.lower().endswith(SQLITE_SUFFIXES) else [path]
+    for part in paths:
+        try:
+            f = open(part, 'rb')
+        except FileNotFoundError:
+            if part == path:
+                raise
+            continue
+        with f:
+            for chunk in iter(lambda: f.read(chunk_size), b''):
+                digest.update(chunk)
+    return digest.hexdigest()
+
+
+def is_diary_db(path):
+    """True if ``path`` is a SQLite database with a diary entries table.
+
+    The check opens the file read-only, so unrelated databases matched by
+    the default patterns are never created into or switched to WAL mode.
+    """
+    try:
+        conn = sqlite3.connect(pathlib.Path(path).absolute().as_uri() + '?mode=ro', uri=True)
+    except sqlite3.Error:
+        return False
+    try:
+        return conn.execute("SELECT 1 FROM sqlite_master WHERE type = 'table' AND name = 'entries'"
+                            ).fetchone() is not None
+    except sqlite3.Error:
+        return False
+    finally:
+        conn.close()
+
+
+def output_name(rel_path, fmt):
+    stem = os.path.splitext(rel_path)[0].replace(os.sep, '__').replace('/', '__')
+    return f'{stem}.{fmt}'
+
+
+def render_diary(input_path, output_path, cache_path, previous_hash=None, force=False):
+    """Render one diary; runs in a worker process and returns a result dict."""
+    start = time.perf_counter()
+    result = {'input': input_path, 'output': output_path}
+    try:
+        if input_path.lower().endswith(SQLITE_SUFFIXES) and not is_diary_db(input_path):
+            result['status'] = 'ignored'
+            result['error'] = 'not a diary database'
+            return result
+        digest = file_hash(input_path)
+        result['hash'] = digest
+        if not force and digest == previous_hash and os.path.exists(output_path):
+            result['status'] = 'skipped'
+            return result
+
+        store = open_store(input_path)
+        try:
+            aggregates = AggregateCache(store, path=cache_path)
+            aggregates.refresh()
+            if aggregates.row_count == 0:
+                result['status'] = 'empty'
+                return result
+            fig = render_figure(aggregates.frame(), aggregates.activity_done, aggregates.total_days,
+                                aggregates.habits())
+        finally:
+            store.close()
+        fig.savefig(output_path, facecolor=fig.get_facecolor())
+        result['status'] = 'rendered'
+    except Exception as e:
+        result['status'] = 'failed'
+        result['error'] = str(e)
+    finally:
+        result['seconds'] = time.perf_counter() - start
+    return result
+
+
+def find_diaries(root, patterns=DEFAULT_PATTERNS):
+    found = []
+    for dirpath, dirnames, filenames in os.walk(root):
+        dirnames[:] = [d for d in dirnames if not d.startswith('.') and not d.endswith('.cols')]
+        for filename in filenames:
+            if any(fnmatch.fnmatch(filename, pattern) for pattern in patterns):
+                found.append(os.path.join(dirpath, filename))
+    return sorted(found)
+
+
+def _load_manifest(path):
+    try:
+        with open(path, 'r', encoding='utf-8') as f:
+            return json.load(f)
+    except (OSError, ValueError):
+        return {}
+
+
+def run(input_dir, output_dir, fmt='png', jobs=None, force=False, patterns=DEFAULT_PATTERNS, log=print):
+    os.makedirs(os.path.join(output_dir, CACHE_DIR_NAME), exist_ok=True)
+    manifest_path = os.path.join(output_dir, MANIFEST_NAME)
+    manifest = _load_manifest(manifest_path)
+    output_root = os.path.abspath(output_dir)
+    diaries = [path for path in find_diaries(input_dir, patterns)
+               if not os.path.abspath(path).startswith(output_root + os.sep)]
+
+    results = []
+    start = time.perf_counter()
+    with ProcessPoolExecutor(max_workers=jobs) as pool:
+        futures = {}
+        for path in diaries:
+            rel_path = os.path.relpath(path, input_dir)
+            name = output_name(rel_path, fmt)
+            previous = manifest.get(rel_path, {})
+            future = pool.submit(render_diary, path, os.path.join(output_dir, name),
+                                 os.path.join(output_dir, CACHE_DIR_NAME, name + '.agg.json'),
+                                 previous.get('hash') if previous.get('output') == name else None, force)
+            futures[future] = (rel_path, name)
+        for future in as_completed(futures):
+            rel_path, name = futures[future]
+            result = future.result()
+            results.append(result)
+            if result['status'] in ('rendered', 'skipped'):
+                manifest[rel_path] = {'hash': result['hash'], 'output': name}
+            detail = f" ({result['error']})" if 'error' in result else ''
+            log(f"{result['status']:>8}  {result['seconds'] * 1000:8.1f} ms  {rel_path}{detail}")
+
+    with open(manifest_path, 'w', encoding='utf-8') as f:
+        json.dump(manifest, f, indent=1, sort_keys=True)
+
+    counts = {}
+    for result in results:
+        counts[result['status']] = counts.get(result['status'], 0) + 1
+    summary = ', '.join(f'{count} {status}' for status, count in sorted(counts.items()))
+    log(f"{len(results)} diaries in {time.perf_counter() - start:.2f} s: {summary or 'nothing to do'}")
+    return results
+
+
+def main(argv=None):
+    parser = argparse.ArgumentParser(description="Render diary dashboards to PNG/PDF without a GUI.")
+    parser.add_argument('input_dir', help="directory containing diary files")
+    parser.add_argument('-o', '--output-dir', default='reports')
+    parser.add_argument('--format', choices=['png', 'pdf'], default='png')
+    parser.add_argument('-j', '--jobs', type=int, default=None, help="worker processes (default: all cores)")
+    parser.add_argument('--pattern', action='append', help="file name glob(s) to render (default: *.csv, *.db)")
+    parser.add_argument('--force', action='store_true', help="re-render even if the input is unchanged")
+    args = parser.parse_args(argv)
+
+    results = run(args.input_dir, args.output_dir, args.format, args.jobs, args.force,
+                  args.pattern or DEFAULT_PATTERNS)
+    return 1 if any(result['status'] == 'failed' for result in results) else 0
+
+
+if __name__ == "__main__":
+    sys.exit(main())
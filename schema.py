@@ -0,0 +1,163 @@
+"""Column schema of a diary entry, shared by the storage backends and the entry form."""
+from collections import namedtuple
+from datetime import date, datetime
+
+# One Field per column, in the order the columns appear in diary_data.csv
+# (new columns go at the end). The same list drives the CSV/SQLite schema
+# and the entry form in form.py:
+#   dtype    "date", "text", "int", "float" or "bool"
+#   section  key into SECTIONS; fields without one are not on the form
+#   widget   "slider", "line", "text", "choice" or "check"
+#   label    caption shown next to / above the widget (checkbox text)
+#   group    key into GROUPS; fields of a group listed together in their
+#            section share a layout
+#   options  widget settings: range, default, placeholder, max_width,
+#            max_height, inline (label left of the widget), choices
+Field = namedtuple("Field", "column dtype section widget label group options",
+                   defaults=(None, None, None, None, None))
+
+FIELDS = [
+    Field("Date", "date"),
+    Field("Task1_Tomorrow", "text", "tomorrow", "line", group="tasks", options={"placeholder": "1)"}),
+    Field("Task2_Tomorrow", "text", "tomorrow", "line", group="tasks", options={"placeholder": "2)"}),
+    Field("Task3_Tomorrow", "text", "tomorrow", "line", group="tasks", options={"placeholder": "3)"}),
+    Field("Happiness_Score", "int", "reflection", "slider", "Happiness Score (1-5)",
+          options={"range": (1, 5), "default": 1, "max_width": 150, "inline": True}),
+    Field("Productivity_Score", "int", "reflection", "slider", "Productivity Score (1-5)",
+          options={"range": (1, 5), "default": 1, "max_width": 150, "inline": True}),
+    Field("Must_Have", "text", "moscow", "line", "Must Have", options={"inline": True}),
+    Field("Should_Have", "text", "moscow", "line", "Should Have", options={"inline": True}),
+    Field("Could_Have", "text", "moscow", "line", "Could Have", options={"inline": True}),
+    Field("Wont_Have", "text", "moscow", "line", "Won't Have", options={"inline": True}),
+    Field("Unhappy_Reason", "text", "reflection", "text", "Reason for Unhappy Moment", "unhappy",
+          options={"max_height": 100}),
+    Field("Unhappy_Importance", "text", "reflection", "choice", "Importance of Unhappy Reason", "unhappy",
+          options={"choices": [("important", "Important"), ("not important", "Not Important"),
+                               ("should not care", "Should Not Care")]}),
+    Field("Happy_Thing1", "text", "reflection", "text", group="happy", options={"max_height": 80}),
+    Field("Happy_Thing2", "text", "reflection", "text", group="happy", options={"max_height": 80}),
+    Field("Change1", "text", "tomorrow", "line", group="changes", options={"placeholder": "1)"}),
+    Field("Change2", "text", "tomorrow", "line", group="changes", options={"placeholder": "2)"}),
+    Field("Change3", "text", "tomorrow", "line", group="changes", options={"placeholder": "3)"}),
+    Field("Time_Wasters", "text", "stats", "line", "Time Wasters Today"),
+    Field("Mistakes", "text", "tomorrow", "line", "Mistakes to Avoid Tomorrow"),
+    Field("Meals", "float", "stats", "line", "No. of Meals", "stats", options={"max_width": 100}),
+    Field("Money_Spent", "float", "stats", "line", "Money Spent ($)", "stats", options={"max_width": 100}),
+    Field("Nap_Hours", "float", "stats", "line", "Hours of Nap", "stats", options={"max_width": 100}),
+    Field("Did_Coding", "bool", "did_today", "check", "Coding", "activities"),
+    Field("Gate_Classes", "bool", "did_today", "check", "Gate Classes", "activities"),
+    Field("Speaking_Skills", "bool", "did_today", "check", "Speaking Skills", "activities"),
+    Field("Workout", "bool", "did_today", "check", "Walk/Workout", "activities"),
+    Field("Meditation", "bool", "did_today", "check", "Meditation", "activities"),
+    Field("Notes", "text", "notes", "text", options={"max_height": 100}),
+]
+
+# (key, title, column of the window, fields top to bottom) in the order the
+# sections are shown. A section lists its fields explicitly because the
+# form does not follow the CSV column order.
+SECTIONS = [
+    ("reflection", "Today's Reflection", "left",
+     ["Happiness_Score", "Productivity_Score", "Unhappy_Reason", "Unhappy_Importance",
+      "Happy_Thing1", "Happy_Thing2"]),
+    ("moscow", "Today's Tasks (MoSCoW)", "left", ["Must_Have", "Should_Have", "Could_Have", "Wont_Have"]),
+    ("notes", "Notes from Today", "left", ["Notes"]),
+    ("stats", "Daily Stats", "right", ["Nap_Hours", "Meals", "Money_Spent", "Time_Wasters"]),
+    ("tomorrow", "Tomorrow's Plan", "right",
+     ["Task1_Tomorrow", "Task2_Tomorrow", "Task3_Tomorrow", "Mistakes", "Change1", "Change2", "Change3"]),
+    ("did_today", "Did Today:", "right",
+     ["Did_Coding", "Gate_Classes", "Speaking_Skills", "Workout", "Meditation"]),
+]
+
+# key -> (caption, layout, widgets per row). "row" puts the fields side by
+# side with their labels above them, "column" stacks them under the caption.
+GROUPS = {
+    "unhappy": (None, "row", None),
+    "happy": ("2 Things You Were Happy About", "row", None),
+    "tasks": ("3 Tasks for Tomorrow", "column", None),
+    "changes": ("3 Things to Change About Yourself", "column", None),
+    "stats": (None, "row", None),
+    "activities": (None, "row", 3),
+}
+
+COLUMNS = [(field.column, field.dtype) for field in FIELDS]
+
+COLUMN_NAMES = [name for name, _ in COLUMNS]
+COLUMN_TYPES = dict(COLUMNS)
+ACTIVITY_COLUMNS = ['Did_Coding', 'Gate_Classes', 'Speaking_Skills', 'Workout', 'Meditation']
+
+
+def parse_value(dtype, value):
+    """Convert a raw (string) cell into its typed value; blanks become None."""
+    if value is None:
+        return None
+    if dtype == "bool":
+        if isinstance(value, bool):
+            return value
+        return str(value).strip().lower() in ("true", "1", "yes")
+    if isinstance(value, str):
+        value = value.strip()
+        if value == "":
+            return None
+    if dtype == "date":
+        text = str(value)[:10]
+        # date.fromisoformat is much faster than strptime, but only take it
+        # for zero-padded YYYY-MM-DD (it also accepts forms like 20240101).
+        if len(text) == 10 and text[4] == "-" and text[7] == "-":
+            try:
+                return date.fromisoformat(text).isoformat()
+            except ValueError:
+                pass
+        try:
+            return datetime.strptime(text, "%Y-%m-%d").strftime("%Y-%m-%d")
+        except ValueError:
+            return None
+    if dtype == "int":
+        try:
+            return int(float(value))
+        except (TypeError, ValueError):
+            return None
+    if dtype == "float":
+        try:
+            return float(value)
+        except (TypeError, ValueError):
+            return None
+    return str(value)
+
+
+def parse_row(row):
+    """Return a typed copy of a {column: raw value} mapping."""
+    return {name: parse_value(dtype, row.get(name)) for name, dtype in COLUMNS}
+
+
+def validate_row(entry):
+    """Check an incoming entry against the schema.
+
+    Returns a {column: value} dict with every column present (missing ones
+    blank) in the form save_data produces, or raises ValueError listing all
+    problems found.
+    """
+    if not isinstance(entry, dict):
+        raise ValueError("entry must be a JSON object")
+    errors = [f"unknown field '{name}'" for name in entry if name not in COLUMN_TYPES]
+    row = {}
+    for name, dtype in COLUMNS:
+        raw = entry.get(name)
+        if raw is None or raw == "":
+            if name == "Date":
+                errors.append("Date is required")
+            row[name] = False if dtype == "bool" else ""
+            continue
+        if dtype == "bool" and not isinstance(raw, bool) and str(raw).strip().lower() not in ("true", "false", "1", "0"):
+            errors.append(f"{name} must be true or false")
+            continue
+        value = parse_value(dtype, raw)
+        if value is None:
+            errors.append(f"{name} must be a valid {dtype}" + (" (YYYY-MM-DD)" if dtype == "date" else ""))
+            continue
+        if name in ("Happiness_Score", "Productivity_Score") and not 1 <= value <= 5:
+            errors.append(f"{name} must be between 1 and 5")
+            continue
+        row[name] = value
+    if errors:
+        raise ValueError("; ".join(errors))
+    return row
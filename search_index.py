@@ -0,0 +1,234 @@
+"""Inverted index over the free-text diary fields.
+
+Documents (one per entry) are kept in an append-only sidecar log next to
+the store (see sidecar.py). update() appends only the entries saved since
+the last call, so the index is never rebuilt on normal saves; a full
+rebuild happens only when the store itself was rewritten. Once the
+postings are loaded, superseded documents are compacted away like the
+other caches' records.
+
+Postings are built in memory from the log on the first search, or ahead
+of it by preload(). Posting lists hold document ids in ascending order.
+A query walks the rarest term's list from the newest document down,
+checks the other terms by binary search (the last term also matches as a
+prefix, for search-as-you-type), and stops once no older document can
+make the top ``limit``: documents are mostly appended in date order, and
+the running maximum date per document bounds what is left. Hits are
+returned with an HTML snippet in which the terms are highlighted. Only
+the latest entry of a date is searchable; earlier versions of an edited
+day are skipped.
+"""
+import bisect
+import heapq
+import html
+import itertools
+import os
+import re
+import threading
+
+from schema import parse_value
+from sidecar import SidecarLog
+
+CACHE_VERSION = 2
+SEARCH_FIELDS = ['Notes', 'Unhappy_Reason', 'Happy_Thing1', 'Happy_Thing2', 'Time_Wasters', 'Mistakes',
+                 'Must_Have', 'Should_Have', 'Could_Have', 'Wont_Have']
+TOKEN_RE = re.compile(r"\w+", re.UNICODE)
+MIN_PREFIX_LENGTH = 2
+SNIPPET_RADIUS = 40
+
+
+def tokenize(text):
+    return TOKEN_RE.findall(text.lower())
+
+
+class SearchIndex:
+
+    def __init__(self, store, path=None):
+        self.store = store
+        # The window saves on a writer thread while searches run on the UI thread.
+        self._lock = threading.RLock()
+        self.path = path or os.path.splitext(store.path)[0] + '.search.json'
+        self.log = SidecarLog(self.path, CACHE_VERSION)
+        self._postings = None
+        self._vocabulary = []
+        self._docs = []
+        self._sort_keys = []
+        self._max_dates = []  # latest date among documents 0..i
+        self._latest = {}
+
+    @property
+    def loaded(self):
+        return self._postings is not None
+
+    def update(self):
+        """Index entries added to the store since the last update."""
+        with self._lock:
+            signature = self.store.signature()
+            if signature == self.log.source:
+                return False
+            if signature is None:
+                rows, cursor, full = [], None, True
+            else:
+                rows, cursor, full = self.store.read_since(self.log.cursor)
+            if full:
+                self.log.reset()
+                if self.loaded:
+                    self._reset_postings()
+
+            docs = []
+            for row in rows:
+                date = parse_value('date', row.get('Date'))
+                if date is None:
+                    continue
+                fields = {name: str(row.get(name) or '').strip() for name in SEARCH_FIELDS}
+                docs.append({'date': date, 'fields': {k: v for k, v in fields.items() if v}})
+            if self.loaded:
+                for doc in docs:
+                    self._add(doc)
+            try:
+                if self.loaded and self.log.needs_compaction(len(self._latest), len(docs)):
+                    self._compact(signature, cursor)
+                elif full:
+                    self.log.rewrite(docs, signature, cursor)
+                else:
+                    self.log.append(docs, signature, cursor)
+            except OSError as e:
+                print(f"Could not save search index: {e}")
+            return True
+
+    def _compact(self, signature, cursor):
+        # Renumber the latest documents in date order, dropping earlier
+        # versions of edited days.
+        docs = [self._docs[doc_id] for doc_id in sorted(self._latest.values(), key=self._sort_keys.__getitem__)]
+        self._reset_postings()
+        for doc in docs:
+            self._add(doc)
+        self.log.rewrite(docs, signature, cursor)
+
+    def _reset_postings(self):
+        self._postings = {}
+        self._vocabulary = []
+        self._docs = []
+        self._sort_keys = []
+        self._max_dates = []
+        self._latest = {}
+
+    def preload(self):
+        """Bring the index up to date and build the postings, e.g. on a background thread."""
+        with self._lock:
+            self.update()
+            if not self.loaded:
+                self._load()
+
+    def _load(self):
+        self._reset_postings()
+        for doc in self.log.records():
+            self._add(doc)
+
+    def _add(self, doc):
+        doc_id = len(self._docs)
+        self._docs.append(doc)
+        self._sort_keys.append((doc['date'], doc_id))
+        self._max_dates.append(max(doc['date'], self._max_dates[-1]) if self._max_dates else doc['date'])
+        self._latest[doc['date']] = doc_id
+        # Joined with spaces, no token can span two fields.
+        tokens = set(tokenize(' '.join(doc['fields'].values())))
+        for token in tokens:
+            postings = self._postings.get(token)
+            if postings is None:
+                self._postings[token] = [doc_id]
+                bisect.insort(self._vocabulary, token)
+            else:
+                postings.append(doc_id)
+
+    def _posting_lists(self, term, prefix):
+        """The sorted posting lists of ``term``, or of every word it prefixes."""
+        if not prefix or len(term) < MIN_PREFIX_LENGTH:
+            postings = self._postings.get(term)
+            return [postings] if postings else []
+        lists = []
+        i = bisect.bisect_left(self._vocabulary, term)
+        while i < len(self._vocabulary) and self._vocabulary[i].startswith(term):
+            lists.append(self._postings[self._vocabulary[i]])
+            i += 1
+        return lists
+
+    @staticmethod
+    def _newest_first(lists):
+        """Document ids of the union of sorted ``lists``, descending, without duplicates."""
+        if len(lists) == 1:
+            return reversed(lists[0])
+        merged = heapq.merge(*(reversed(postings) for postings in lists), reverse=True)
+        return (doc_id for doc_id, _ in itertools.groupby(merged))
+
+    @staticmethod
+    def _contains(lists, doc_id):
+        for postings in lists:
+            i = bisect.bisect_left(postings, doc_id)
+            if i < len(postings) and postings[i] == doc_id:
+                return True
+        return False
+
+    def search(self, query, limit=50):
+        """Return up to ``limit`` hits, newest first, as dicts with date, field and snippet."""
+        with self._lock:
+            terms = tokenize(query)
+            if not terms or limit <= 0:
+                return []
+            self.update()
+            if not self.loaded:
+                self._load()
+
+            term_lists = []
+            for i, term in enumerate(terms):
+                lists = self._posting_lists(term, prefix=i == len(terms) - 1)
+                if not lists:
+                    return []
+                term_lists.append(lists)
+            term_lists.sort(key=lambda lists: sum(map(len, lists)))
+            rarest, others = term_lists[0], term_lists[1:]
+
+            best = []  # min-heap of the top ``limit`` sort keys so far
+            for doc_id in self._newest_first(rarest):
+                # Documents from here down are no newer than the running maximum date.
+                if len(best) == limit and best[0] > (self._max_dates[doc_id], doc_id):
+                    break
+                key = self._sort_keys[doc_id]
+                if self._latest[key[0]] != doc_id or not all(self._contains(lists, doc_id) for lists in others):
+                    continue
+                if len(best) < limit:
+                    heapq.heappush(best, key)
+                elif key > best[0]:
+                    heapq.heapreplace(best, key)
+
+            hits = []
+            for _, doc_id in sorted(best, reverse=True):
+                doc = self._docs[doc_id]
+                field, snippet = self._snippet(doc, terms)
+                hits.append({'date': doc['date'], 'field': field, 'snippet': snippet})
+            return hits
+
+    @staticmethod
+    def _snippet(doc, terms):
+        # Only the last term matches as a prefix, as in search().
+        last = terms[-1]
+        alternatives = [re.escape(t) + r"\b" for t in terms[:-1]]
+        alternatives.append(re.escape(last) + (r"\w*" if len(last) >= MIN_PREFIX_LENGTH else r"\b"))
+        pattern = re.compile(r"\b(?:" + "|".join(alternatives) + ")", re.IGNORECASE | re.UNICODE)
+        for field, text in doc['fields'].items():
+            match = pattern.search(text)
+            if match is None:
+                continue
+            start = max(0, match.start() - SNIPPET_RADIUS)
+            end = min(len(text), match.end() + SNIPPET_RADIUS)
+            excerpt = text[start:end]
+            parts = []
+            last = 0
+            for m in pattern.finditer(excerpt):
+                parts.append(html.escape(excerpt[last:m.start()]))
+                parts.append(f"<b>{html.escape(m.group(0))}</b>")
+                last = m.end()
+            parts.append(html.escape(excerpt[last:]))
+            snippet = ('…' if start > 0 else '') + ''.join(parts) + ('…' if end < len(text) else '')
+            return field, snippet
+        return None, ''
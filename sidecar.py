@@ -0,0 +1,92 @@
+"""Append-only JSON-lines sidecar with a small JSON manifest.
+
+Caches derived from the diary store (aggregates, the date index) keep
+their state as a log of records next to the store, plus a manifest holding
+the store signature, the read cursor and the committed log size. Adding
+records appends to the log and rewrites only the manifest, so persisting
+is O(new records) however long the history is; anything past the
+committed size is a half-written batch from a crash and is cut off before
+the next append. Owners compact the log with rewrite() once
+needs_compaction() says superseded records outweigh the live ones.
+"""
+import json
+import os
+
+COMPACT_SLACK = 1024  # superseded records tolerated before the log is compacted
+
+_encoder = json.JSONEncoder(separators=(',', ':'))
+
+
+class SidecarLog:
+
+    def __init__(self, manifest_path, version):
+        self.manifest_path = manifest_path
+        self.log_path = os.path.splitext(manifest_path)[0] + '.jsonl'
+        self.version = version
+        self.manifest = self._read_manifest()
+
+    def _read_manifest(self):
+        try:
+            with open(self.manifest_path, 'r', encoding='utf-8') as f:
+                manifest = json.load(f)
+        except (OSError, ValueError):
+            return self._empty()
+        return manifest if manifest.get('version') == self.version else self._empty()
+
+    def _empty(self):
+        return {'version': self.version, 'source': None, 'cursor': None, 'log_size': 0, 'records': 0}
+
+    def _write_manifest(self):
+        tmp_path = f"{self.manifest_path}.tmp{os.getpid()}"
+        with open(tmp_path, 'w', encoding='utf-8') as f:
+            json.dump(self.manifest, f)
+        os.replace(tmp_path, self.manifest_path)
+
+    @property
+    def source(self):
+        return self.manifest['source']
+
+    @property
+    def cursor(self):
+        return self.manifest['cursor']
+
+    def records(self):
+        """Yield the committed records in the order they were appended."""
+        if not self.manifest['log_size']:
+            return
+        try:
+            with open(self.log_path, 'rb') as f:
+                data = f.read(self.manifest['log_size'])
+        except FileNotFoundError:
+            return
+        for line in data.decode('utf-8').splitlines():
+            yield json.loads(line)
+
+    def needs_compaction(self, live, incoming):
+        """True if ``incoming`` more records would leave the log mostly superseded."""
+        return self.manifest['records'] + incoming > 2 * live + COMPACT_SLACK
+
+    def reset(self):
+        self.manifest = self._empty()
+
+    def append(self, records, source, cursor):
+        payload = ''.join(_encoder.encode(record) + '\n' for record in records).encode('utf-8')
+        with open(self.log_path, 'ab') as f:
+            f.truncate(self.manifest['log_size'])
+            f.write(payload)
+        self.manifest.update({'source': source, 'cursor': cursor,
+                              'log_size': self.manifest['log_size'] + len(payload),
+                              'records': self.manifest['records'] + len(records)})
+        self._write_manifest()
+
+    def rewrite(self, records, source, cursor):
+        """Replace the whole log, e.g. to drop superseded records."""
+        # Invalidate first: a crash before the new manifest is written then
+        # forces a rebuild instead of trusting a log of the wrong size.
+        self.reset()
+        self._write_manifest()
+        tmp_path = f"{self.log_path}.tmp{os.getpid()}"
+        with open(tmp_path, 'wb'):
+            pass
+        os.replace(tmp_path, self.log_path)
+        self.append(records, source, cursor)
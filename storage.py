@@ -0,0 +1,382 @@
+"""Storage backends for diary entries.
+
+Two interchangeable stores are provided:
+
+* CsvStore keeps the historical diary_data.csv format. Rows are formatted
+  with the csv module and written with a single append under an exclusive
+  file lock, so concurrent writers cannot interleave. A row torn by a
+  crashed writer is kept, never truncated: the next append terminates it
+  and readers skip it because it lacks fields. An unterminated last row
+  that has every field, as in a hand-edited file, is read as usual.
+* SqliteStore keeps entries in an SQLite database in WAL mode with a typed
+  schema mirroring the CSV columns.
+
+open_store() picks the backend from the file extension. The DIARY_STORE
+environment variable overrides the default diary_data.csv location.
+
+Run ``python storage.py migrate [diary_data.csv] [diary_data.db]`` to copy an
+existing CSV diary into SQLite.
+"""
+import csv
+import hashlib
+import io
+import os
+import sqlite3
+import sys
+import threading
+from contextlib import contextmanager
+
+from instrument import count
+from schema import COLUMNS, COLUMN_NAMES, COLUMN_TYPES, parse_row
+
+try:
+    import fcntl
+except ImportError:  # Windows
+    fcntl = None
+    import msvcrt
+
+DATA_FILE = 'diary_data.csv'
+SQLITE_SUFFIXES = ('.db', '.sqlite', '.sqlite3')
+SQL_TYPES = {"date": "TEXT", "text": "TEXT", "int": "INTEGER", "float": "REAL", "bool": "INTEGER"}
+TAIL_CHECK_BYTES = 64
+
+
+def default_store_path():
+    return os.environ.get('DIARY_STORE', DATA_FILE)
+
+
+def open_store(path=None):
+    path = path or default_store_path()
+    if path.lower().endswith(SQLITE_SUFFIXES):
+        return SqliteStore(path)
+    return CsvStore(path)
+
+
+@contextmanager
+def _locked(fd, shared=False):
+    if fcntl is not None:
+        fcntl.flock(fd, fcntl.LOCK_SH if shared else fcntl.LOCK_EX)
+        try:
+            yield
+        finally:
+            fcntl.flock(fd, fcntl.LOCK_UN)
+    else:
+        os.lseek(fd, 0, os.SEEK_SET)
+        msvcrt.locking(fd, msvcrt.LK_LOCK, 1)
+        try:
+            yield
+        finally:
+            os.lseek(fd, 0, os.SEEK_SET)
+            msvcrt.locking(fd, msvcrt.LK_UNLCK, 1)
+
+
+def _pread(fd, length, offset):
+    os.lseek(fd, offset, os.SEEK_SET)
+    return os.read(fd, length)
+
+
+class DiaryStore:
+    """Interface shared by the storage backends."""
+
+    def __init__(self, path):
+        self.path = path
+
+    def append(self, row):
+        self.append_many([row])
+
+    def append_many(self, rows):
+        raise NotImplementedError
+
+    def read_frame(self, columns=None):
+        raise NotImplementedError
+
+    def read_since(self, cursor=None):
+        """Return (rows, cursor, full) for entries added after ``cursor``.
+
+        ``cursor`` is an opaque, JSON-serialisable value from a previous
+        call. When it is missing or no longer matches the underlying data
+        (the store was rewritten) every entry is returned and ``full`` is
+        True, so callers can reset any state derived from earlier rows.
+        """
+        entries, cursor, full = self.scan_since(cursor)
+        return [row for _, row in entries], cursor, full
+
+    def scan_since(self, cursor=None):
+        """Like read_since(), but entries come as (location, row) pairs.
+
+        A location is a small JSON-serialisable value that read_rows() turns
+        back into the row without scanning the store.
+        """
+        raise NotImplementedError
+
+    def read_rows(self, locations):
+        """Return the rows stored at ``locations`` (None where unreadable)."""
+        raise NotImplementedError
+
+    def signature(self):
+        """Cheap fingerprint of the stored data (file sizes and mtimes)."""
+        try:
+            st = os.stat(self.path)
+        except FileNotFoundError:
+            return None
+        return [st.st_size, st.st_mtime_ns]
+
+    def exists(self):
+        return os.path.exists(self.path)
+
+    def close(self):
+        pass
+
+
+class CsvStore(DiaryStore):
+
+    def append_many(self, rows):
+        buffer = io.StringIO()
+        writer = csv.writer(buffer, lineterminator='\n')
+        for row in rows:
+            writer.writerow(['' if row.get(name) is None else row.get(name) for name in COLUMN_NAMES])
+        payload = buffer.getvalue().encode('utf-8')
+        if not payload:
+            return
+
+        fd = os.open(self.path, os.O_RDWR | os.O_CREAT | os.O_APPEND, 0o644)
+        try:
+            with _locked(fd):
+                size = os.fstat(fd).st_size
+                if size == 0:
+                    header = ','.join(COLUMN_NAMES) + '\n'
+                    payload = header.encode('utf-8') + payload
+                elif _pread(fd, 1, size - 1) != b'\n':
+                    # Hand-edited files and writers that crashed mid-row can
+                    # leave the last line unterminated. Terminate it rather
+                    # than truncating, so no data is ever discarded; readers
+                    # skip a torn row by its field count.
+                    payload = b'\n' + payload
+                os.write(fd, payload)
+                os.fsync(fd)
+                count("bytes_written", len(payload))
+                count("rows_written", len(rows))
+        finally:
+            os.close(fd)
+
+    def read_frame(self, columns=None):
+        import pandas as pd
+        return pd.read_csv(self.path, on_bad_lines='skip', usecols=columns)
+
+    @staticmethod
+    def _is_complete_row(line, field_count):
+        parsed = list(csv.reader(io.StringIO(line.decode('utf-8', errors='replace'))))
+        return len(parsed) == 1 and len(parsed[0]) == field_count
+
+    def _settled_size(self):
+        # Writers hold the lock for the whole append, so once a shared lock
+        # is granted no row is half-written.
+        fd = os.open(self.path, os.O_RDONLY)
+        try:
+            with _locked(fd, shared=True):
+                return os.fstat(fd).st_size
+        finally:
+            os.close(fd)
+
+    def scan_since(self, cursor=None):
+        with open(self.path, 'rb') as f:
+            size = os.fstat(f.fileno()).st_size
+            offset = 0
+            header = None
+            if cursor and cursor.get('offset', 0) <= size:
+                start = max(0, cursor['offset'] - TAIL_CHECK_BYTES)
+                f.seek(start)
+                tail = f.read(cursor['offset'] - start)
+                # Rows are parsed with the cursor's header; a cursor without
+                # one cannot be resumed from.
+                if cursor.get('header') and hashlib.sha1(tail).hexdigest() == cursor.get('tail'):
+                    offset = cursor['offset']
+                    header = cursor.get('header')
+            f.seek(offset)
+            data = f.read(size - offset)
+
+        # Only consume complete rows. An unterminated last line counts if it
+        # already has every field and no append was under way when it was
+        # read; otherwise it may still be being written and is picked up by
+        # the next call.
+        terminated = data[:data.rfind(b'\n') + 1]
+        if header is None:
+            # An empty file, or a header still being written: there is no
+            # position worth remembering yet.
+            newline = data.find(b'\n')
+            if newline == -1:
+                return [], None, True
+            header = next(csv.reader([data[:newline].decode('utf-8', errors='replace')]), None)
+            if not header:
+                return [], None, True
+        tail = data[len(terminated):]
+        if tail and not (self._is_complete_row(tail, len(header)) and self._settled_size() == size):
+            data = terminated
+
+        # Feed the reader line by line so every row's byte range is known;
+        # csv.reader pulls exactly the lines of one record per row.
+        lines = data.splitlines(keepends=True)
+        position = offset
+
+        def feed():
+            nonlocal position
+            for line in lines:
+                position += len(line)
+                yield line.decode('utf-8', errors='replace')
+
+        entries = []
+        start = offset
+        for values in csv.reader(feed()):
+            if len(values) == len(header) and start > 0:
+                entries.append(([start, position - start], dict(zip(header, values))))
+            # else: the header, or a blank, torn or malformed line
+            start = position
+
+        end = offset + len(data)
+        with open(self.path, 'rb') as f:
+            f.seek(max(0, end - TAIL_CHECK_BYTES))
+            tail = f.read(end - max(0, end - TAIL_CHECK_BYTES))
+        cursor = {'offset': end, 'tail': hashlib.sha1(tail).hexdigest(), 'header': header}
+        count("rows_read", len(entries))
+        count("bytes_read", len(data))
+        return entries, cursor, offset == 0
+
+    def read_rows(self, locations):
+        if not locations:
+            return []
+        rows = []
+        try:
+            f = open(self.path, 'rb')
+        except FileNotFoundError:
+            return [None] * len(locations)
+        with f:
+            header = next(csv.reader([f.readline().decode('utf-8', errors='replace')]), [])
+            for offset, length in locations:
+                f.seek(offset)
+                values = next(csv.reader(io.StringIO(f.read(length).decode('utf-8', errors='replace'))), [])
+                rows.append(dict(zip(header, values)) if len(values) == len(header) else None)
+        return rows
+
+
+class SqliteStore(DiaryStore):
+
+    def __init__(self, path):
+        super().__init__(path)
+        self._lock = threading.Lock()
+        self._conn = sqlite3.connect(path, timeout=5.0, check_same_thread=False)
+        self._conn.execute('PRAGMA journal_mode=WAL')
+        self._conn.execute('PRAGMA synchronous=NORMAL')
+        column_defs = ', '.join(f'"{name}" {SQL_TYPES[dtype]}' for name, dtype in COLUMNS)
+        with self._conn:
+            self._conn.execute(f'CREATE TABLE IF NOT EXISTS entries (id INTEGER PRIMARY KEY, {column_defs})')
+        placeholders = ', '.join('?' for _ in COLUMN_NAMES)
+        quoted = ', '.join(f'"{name}"' for name in COLUMN_NAMES)
+        self._insert_sql = f'INSERT INTO entries ({quoted}) VALUES ({placeholders})'
+
+    def append_many(self, rows):
+        values = []
+        for row in rows:
+            typed = parse_row(row)
+            values.append([int(typed[name]) if COLUMN_TYPES[name] == "bool" and typed[name] is not None
+                           else typed[name] for name in COLUMN_NAMES])
+        with self._lock, self._conn:
+            self._conn.executemany(self._insert_sql, values)
+        count("rows_written", len(values))
+
+    def read_frame(self, columns=None):
+        import pandas as pd
+        columns = columns or COLUMN_NAMES
+        quoted = ', '.join(f'"{name}"' for name in columns)
+        with self._lock:
+            df = pd.read_sql_query(f'SELECT {quoted} FROM entries ORDER BY id', self._conn)
+        for name in columns:
+            if COLUMN_TYPES[name] == "bool":
+                df[name] = df[name].fillna(0).astype(bool)
+        return df
+
+    def _row(self, values):
+        row = dict(zip(COLUMN_NAMES, values))
+        for name in COLUMN_NAMES:
+            if COLUMN_TYPES[name] == "bool" and row[name] is not None:
+                row[name] = bool(row[name])
+        return row
+
+    def scan_since(self, cursor=None):
+        quoted = ', '.join(f'"{name}"' for name in COLUMN_NAMES)
+        with self._lock:
+            last_id = 0
+            if cursor and cursor.get('id'):
+                found = self._conn.execute('SELECT "Date" FROM entries WHERE id = ?', (cursor['id'],)).fetchone()
+                if found is not None and found[0] == cursor.get('date'):
+                    last_id = cursor['id']
+            result = self._conn.execute(f'SELECT id, {quoted} FROM entries WHERE id > ? ORDER BY id', (last_id,)).fetchall()
+        entries = [(values[0], self._row(values[1:])) for values in result]
+        count("rows_read", len(entries))
+        if result:
+            cursor = {'id': result[-1][0], 'date': result[-1][1]}
+        elif last_id == 0:
+            cursor = None
+        return entries, cursor, last_id == 0
+
+    def read_rows(self, locations):
+        quoted = ', '.join(f'"{name}"' for name in COLUMN_NAMES)
+        found = {}
+        with self._lock:
+            for i in range(0, len(locations), 500):
+                chunk = locations[i:i + 500]
+                placeholders = ', '.join('?' for _ in chunk)
+                for values in self._conn.execute(f'SELECT id, {quoted} FROM entries WHERE id IN ({placeholders})',
+                                                 chunk):
+                    found[values[0]] = self._row(values[1:])
+        return [found.get(location) for location in locations]
+
+    def signature(self):
+        parts = []
+        for path in (self.path, self.path + '-wal'):
+            try:
+                st = os.stat(path)
+                parts += [st.st_size, st.st_mtime_ns]
+            except FileNotFoundError:
+                parts += [0, 0]
+        return parts
+
+    def close(self):
+        self._conn.close()
+
+
+def migrate_csv(csv_path, db_path, batch_size=1000):
+    """Stream a CSV diary into an SQLite store; returns (migrated, skipped)."""
+    store = SqliteStore(db_path)
+    migrated = skipped = 0
+    batch = []
+    try:
+        with open(csv_path, newline='', encoding='utf-8') as f:
+            reader = csv.reader(f)
+            header = next(reader, None)
+            if header is None:
+                return 0, 0
+            for values in reader:
+                if len(values) != len(header):
+                    skipped += 1
+                    continue
+                batch.append(dict(zip(header, values)))
+                if len(batch) >= batch_size:
+                    store.append_many(batch)
+                    migrated += len(batch)
+                    batch = []
+        if batch:
+            store.append_many(batch)
+            migrated += len(batch)
+    finally:
+        store.close()
+    return migrated, skipped
+
+
+if __name__ == "__main__":
+    if len(sys.argv) < 2 or sys.argv[1] != 'migrate':
+        print("usage: python storage.py migrate [diary_data.csv] [diary_data.db]")
+        sys.exit(2)
+    source = sys.argv[2] if len(sys.argv) > 2 else DATA_FILE
+    target = sys.argv[3] if len(sys.argv) > 3 else os.path.splitext(source)[0] + '.db'
+    migrated, skipped = migrate_csv(source, target)
+    print(f"Migrated {migrated} entries from {source} to {target} ({skipped} malformed rows skipped).")
@@ -0,0 +1,120 @@
+import os
+
+from aggregates import AggregateCache
+from date_index import DateIndex
+from schema import COLUMN_NAMES
+from storage import CsvStore, SqliteStore
+
+HEADER = ','.join(COLUMN_NAMES) + '\n'
+
+
+def entry(date, notes=''):
+    return {'Date': date, 'Happiness_Score': 3, 'Notes': notes}
+
+
+def csv_line(date, notes=''):
+    values = entry(date, notes)
+    return ','.join(str(values.get(name, '')) for name in COLUMN_NAMES)
+
+
+def write(path, text):
+    with open(path, 'w', encoding='utf-8', newline='') as f:
+        f.write(text)
+
+
+def test_empty_file_has_no_cursor(tmp_path):
+    store = CsvStore(str(tmp_path / 'diary.csv'))
+    write(store.path, '')
+    assert store.scan_since() == ([], None, True)
+
+
+def test_rows_appended_to_empty_file_reach_the_caches(tmp_path):
+    store = CsvStore(str(tmp_path / 'diary.csv'))
+    write(store.path, '')
+    index = DateIndex(store)
+    aggregates = AggregateCache(store)
+    index.refresh()
+    aggregates.refresh()
+    index.upsert(entry('2024-01-01'))
+    index.upsert(entry('2024-01-02'))
+    aggregates.refresh()
+    assert index.dates == ['2024-01-01', '2024-01-02']
+    assert aggregates.total_days == 2
+    # A restart resumes from the saved cursor.
+    assert DateIndex(store).range() == ['2024-01-01', '2024-01-02']
+    restarted = AggregateCache(store)
+    restarted.refresh()
+    assert restarted.total_days == 2
+
+
+def test_header_only_file(tmp_path):
+    store = CsvStore(str(tmp_path / 'diary.csv'))
+    write(store.path, HEADER)
+    rows, cursor, full = store.read_since()
+    assert rows == [] and full
+    assert cursor['header'] == COLUMN_NAMES and cursor['offset'] == len(HEADER)
+    store.append(entry('2024-01-01'))
+    rows, _, full = store.read_since(cursor)
+    assert [row['Date'] for row in rows] == ['2024-01-01'] and not full
+
+
+def test_unterminated_header_is_not_a_cursor(tmp_path):
+    store = CsvStore(str(tmp_path / 'diary.csv'))
+    write(store.path, HEADER[:20])
+    assert store.read_since() == ([], None, True)
+
+
+def test_unterminated_complete_tail_is_read_and_kept(tmp_path):
+    store = CsvStore(str(tmp_path / 'diary.csv'))
+    write(store.path, HEADER + csv_line('2024-01-01') + '\n' + csv_line('2024-01-02', 'last'))
+    rows, cursor, _ = store.read_since()
+    assert [row['Date'] for row in rows] == ['2024-01-01', '2024-01-02']
+    assert cursor['offset'] == os.path.getsize(store.path)
+    store.append(entry('2024-01-03'))
+    rows, _, full = store.read_since(cursor)
+    assert [row['Date'] for row in rows] == ['2024-01-03'] and not full
+    assert [row['Notes'] for row in store.read_since()[0]] == ['', 'last', '']
+
+
+def test_torn_tail_waits_and_is_skipped_once_terminated(tmp_path):
+    store = CsvStore(str(tmp_path / 'diary.csv'))
+    torn = csv_line('2024-01-02')[:15]
+    write(store.path, HEADER + csv_line('2024-01-01') + '\n' + torn)
+    rows, cursor, _ = store.read_since()
+    assert [row['Date'] for row in rows] == ['2024-01-01']
+    assert cursor['offset'] == os.path.getsize(store.path) - len(torn)
+    store.append(entry('2024-01-03'))
+    rows, _, _ = store.read_since(cursor)
+    assert [row['Date'] for row in rows] == ['2024-01-03']
+
+
+def test_tail_still_being_appended_is_not_consumed(tmp_path, monkeypatch):
+    store = CsvStore(str(tmp_path / 'diary.csv'))
+    line = csv_line('2024-01-02', 'a longer note')
+    # The bytes so far already parse as a full row, but the writer is
+    # mid-append and finishes before the reader gets the lock.
+    cut = line.index('a longer') + 1
+    write(store.path, HEADER + csv_line('2024-01-01') + '\n' + line[:cut])
+    settled = CsvStore._settled_size
+
+    def finish_append(self):
+        with open(self.path, 'a', encoding='utf-8', newline='') as f:
+            f.write(line[cut:] + '\n')
+        return settled(self)
+
+    monkeypatch.setattr(CsvStore, '_settled_size', finish_append)
+    rows, cursor, _ = store.read_since()
+    assert [row['Date'] for row in rows] == ['2024-01-01']
+    monkeypatch.undo()
+    rows, _, _ = store.read_since(cursor)
+    assert [row['Notes'] for row in rows] == ['a longer note']
+
+
+def test_sqlite_row_without_habits(tmp_path):
+    store = SqliteStore(str(tmp_path / 'diary.db'))
+    try:
+        store.append(entry('2024-01-01'))
+        rows, _, _ = store.read_since()
+    finally:
+        store.close()
+    assert [row['Date'] for row in rows] == ['2024-01-01']
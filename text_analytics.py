@@ -0,0 +1,290 @@
+"""Recurring themes in the free-text fields, behind the dashboard's Themes tab.
+
+Each entry's text is tokenized and scored once:
+
+* keywords of Unhappy_Reason and Time_Wasters (lower-cased words without
+  stop words, each counted once per entry),
+* a lexicon sentiment of Notes and Happy_Thing1/2: positive and negative
+  word counts, with "not"/"never"/... flipping the next two words.
+
+Analyses are cached by a hash of those fields in an append-only sidecar log
+(see sidecar.py), next to the Unhappy_Importance category and the
+Happiness_Score of the latest entry per date. refresh() reads only rows
+appended since the last call and analyses only texts whose hash is new, so
+saving or editing an entry re-analyses that entry alone, and a rewritten
+store is re-read but not re-analysed. A large batch of new texts (the first
+build over years of entries) is split across a process pool. Keyword and
+category counts and a histogram of sentiment scores per Happiness_Score
+are kept up to date as entries change, so themes() does not grow with the
+history.
+"""
+import hashlib
+import heapq
+import multiprocessing
+import os
+import re
+import threading
+from collections import Counter
+from concurrent.futures import ProcessPoolExecutor
+
+from schema import parse_value
+from sidecar import SidecarLog
+
+CACHE_VERSION = 1
+KEYWORD_FIELDS = ['Unhappy_Reason', 'Time_Wasters']
+SENTIMENT_FIELDS = ['Notes', 'Happy_Thing1', 'Happy_Thing2']
+TEXT_FIELDS = KEYWORD_FIELDS + SENTIMENT_FIELDS
+IMPORTANCE_FIELD = 'Unhappy_Importance'
+POOL_THRESHOLD = 5000  # new texts before analysis fans out to worker processes
+POOL_CHUNK = 1000
+NEGATION_SCOPE = 2
+SCORE_DECIMALS = 2  # sentiment histogram resolution
+
+TOKEN_RE = re.compile(r"[a-z]+(?:'[a-z]+)*")
+STOP_WORDS = frozenset("""
+    a about after again all also am an and any are as at be because been before being but by can could
+    did do does doing done during each even every feel feeling felt few for from get getting go going got
+    had has have having he her here him his how i if in into is it its just like lot made make me more
+    most much my no not now of off on once only or other our out over really so some still such than that
+    the their them then there these they thing things this those through to too today up us very was we
+    were what when where which while who why will with would yet you your
+""".split())
+NEGATIONS = frozenset("""
+    not no never nothing nobody hardly barely don't didn't doesn't isn't wasn't weren't can't couldn't
+    won't wouldn't shouldn't haven't hasn't cannot
+""".split())
+POSITIVE_WORDS = frozenset("""
+    accomplished amazing awesome beautiful best better calm cheerful clear comfortable confident cozy
+    delicious delighted done easy energetic energized enjoy enjoyed excellent excited fantastic finished
+    focused fresh friendly fun glad good grateful great happy healthy helpful hopeful improved inspired
+    joy kind laughed learned love loved lovely lucky motivated nice peaceful perfect pleasant productive
+    progress proud refreshed relaxed relieved rested satisfied smooth solved success successful support
+    supportive sunny thankful well win wonderful
+""".split())
+NEGATIVE_WORDS = frozenset("""
+    afraid angry annoyed anxious awful bad bored boring broken confused crying depressed difficult
+    disappointed distracted drained exhausted fail failed failing fear frustrated frustrating guilty hard
+    hate hurt ill lazy lonely lost mad mess messy miserable missed nervous overwhelmed pain painful panic
+    poor problem problems rushed rushing sad sick slow stress stressed stressful stuck terrible tired
+    ugly unhappy upset worried worry worse worst wrong
+""".split())
+SENTIMENT_WORDS = POSITIVE_WORDS | NEGATIVE_WORDS
+
+
+def cache_path_for(store_path):
+    return os.path.splitext(store_path)[0] + '.text.json'
+
+
+def tokenize(text):
+    return TOKEN_RE.findall(text.lower())
+
+
+def keywords(text):
+    """Distinct content words of ``text`` in order of first appearance."""
+    return list(dict.fromkeys(word for word in tokenize(text)
+                              if len(word) > 2 and "'" not in word and word not in STOP_WORDS))
+
+
+def sentiment_counts(text):
+    """(positive, negative) lexicon word counts, with negated words flipped."""
+    tokens = tokenize(text)
+    if SENTIMENT_WORDS.isdisjoint(tokens):
+        return 0, 0
+    positive = negative = 0
+    negated = 0
+    for token in tokens:
+        if token in NEGATIONS:
+            negated = NEGATION_SCOPE
+            continue
+        if token in POSITIVE_WORDS or token in NEGATIVE_WORDS:
+            if (token in POSITIVE_WORDS) != (negated > 0):
+                positive += 1
+            else:
+                negative += 1
+        if negated:
+            negated -= 1
+    return positive, negative
+
+
+def sentiment_score(positive, negative):
+    """Score in [-1, 1], or None when no lexicon word occurred."""
+    total = positive + negative
+    return (positive - negative) / total if total else None
+
+
+def analyze(texts):
+    """Analysis of one entry's TEXT_FIELDS values: [[keywords per KEYWORD_FIELD], positive, negative]."""
+    found = [keywords(text) for text in texts[:len(KEYWORD_FIELDS)]]
+    counts = [sentiment_counts(text) for text in texts[len(KEYWORD_FIELDS):]]
+    return [found, sum(p for p, _ in counts), sum(n for _, n in counts)]
+
+
+def analyze_many(batch):
+    return [analyze(texts) for texts in batch]
+
+
+def analyze_all(batch):
+    if len(batch) < POOL_THRESHOLD or (os.cpu_count() or 1) < 2:
+        return analyze_many(batch)
+    chunks = [batch[i:i + POOL_CHUNK] for i in range(0, len(batch), POOL_CHUNK)]
+    # spawn: the app calls this with Qt and loader threads running, which fork does not survive safely.
+    with ProcessPoolExecutor(mp_context=multiprocessing.get_context('spawn')) as pool:
+        return [analysis for results in pool.map(analyze_many, chunks) for analysis in results]
+
+
+def content_hash(texts):
+    return hashlib.blake2b('\x1f'.join(texts).encode('utf-8'), digest_size=8).hexdigest()
+
+
+class TextCache:
+
+    def __init__(self, store, path=None):
+        self.store = store
+        self.path = path or cache_path_for(store.path)
+        self._lock = threading.RLock()
+        self.log = None
+        self.analyses = {}  # content hash -> analyze() result
+        self._reset()
+
+    def _reset(self):
+        # date -> [content hash, Unhappy_Importance, Happiness_Score]
+        self.days = {}
+        self.keyword_counts = {name: Counter() for name in KEYWORD_FIELDS}
+        self.importance_counts = Counter()  # (YYYY-MM, category) -> entries
+        self.sentiment_totals = [0, 0]
+        self.sentiment_counts = Counter()  # (Happiness_Score, rounded sentiment score) -> entries
+
+    def _load(self):
+        self.log = SidecarLog(self.path, CACHE_VERSION)
+        for kind, *record in self.log.records():
+            if kind == 'a':
+                self.analyses[record[0]] = record[1]
+            else:
+                self._set_day(record[0], record[1:])
+
+    def _count(self, date, values, sign):
+        digest, importance, happiness = values
+        found, positive, negative = self.analyses[digest]
+        for name, words in zip(KEYWORD_FIELDS, found):
+            counts = self.keyword_counts[name]
+            for word in words:
+                counts[word] += sign
+        if importance:
+            self.importance_counts[(date[:7], importance)] += sign
+        self.sentiment_totals[0] += sign * positive
+        self.sentiment_totals[1] += sign * negative
+        score = sentiment_score(positive, negative)
+        if score is not None and happiness is not None:
+            self.sentiment_counts[(happiness, round(score, SCORE_DECIMALS))] += sign
+
+    def _set_day(self, date, values):
+        previous = self.days.get(date)
+        if previous is not None:
+            self._count(date, previous, -1)
+        self.days[date] = values
+        self._count(date, values, 1)
+
+    def refresh(self):
+        """Bring the cache up to date with the store; returns True if it changed."""
+        with self._lock:
+            if self.log is None:
+                self._load()
+            signature = self.store.signature()
+            if signature is None:
+                if self.days:
+                    self._reset()
+                    return True
+                return False
+            if signature == self.log.source:
+                return False
+
+            rows, cursor, full = self.store.read_since(self.log.cursor)
+            if full:
+                # Keep the analyses: a rewritten store mostly holds known texts.
+                self._reset()
+            records = self.add_rows(rows)
+            try:
+                if full or self.log.needs_compaction(len(self.days), len(records)):
+                    self.log.rewrite(self._records(), signature, cursor)
+                else:
+                    self.log.append(records, signature, cursor)
+            except OSError as e:
+                print(f"Could not save text analytics cache: {e}")
+            return True
+
+    def _records(self):
+        """Every live analysis and day, dropping analyses no entry uses any more."""
+        live = {values[0] for values in self.days.values()}
+        self.analyses = {digest: analysis for digest, analysis in self.analyses.items() if digest in live}
+        return ([['a', digest, analysis] for digest, analysis in self.analyses.items()] +
+                [['d', date] + values for date, values in self.days.items()])
+
+    def add_rows(self, rows):
+        """Apply rows in store order (later rows win); returns the new records."""
+        parsed = []
+        pending = {}
+        for row in rows:
+            date = parse_value('date', row.get('Date'))
+            if date is None:
+                continue
+            texts = tuple(parse_value('text', row.get(name)) or '' for name in TEXT_FIELDS)
+            digest = content_hash(texts)
+            if digest not in self.analyses:
+                pending.setdefault(digest, texts)
+            importance = parse_value('text', row.get(IMPORTANCE_FIELD))
+            parsed.append((date, [digest, importance.lower() if importance else None,
+                                  parse_value('int', row.get('Happiness_Score'))]))
+
+        records = []
+        for digest, analysis in zip(pending, analyze_all(list(pending.values()))):
+            self.analyses[digest] = analysis
+            records.append(['a', digest, analysis])
+        for date, values in parsed:
+            self._set_day(date, values)
+            records.append(['d', date] + values)
+        return records
+
+    def themes(self, top=10):
+        """Snapshot for the dashboard: top keywords, importance by month, sentiment vs happiness.
+
+        ``sentiment`` maps each Happiness_Score to {sentiment score: entries},
+        scores rounded to SCORE_DECIMALS.
+        """
+        with self._lock:
+            keywords_by_field = {name: [(word, n) for word, n in heapq.nlargest(top, counts.items(),
+                                                                               key=lambda item: item[1]) if n > 0]
+                                 for name, counts in self.keyword_counts.items()}
+            importance = {}
+            for (month, category), n in self.importance_counts.items():
+                if n > 0:
+                    importance.setdefault(category, {})[month] = n
+            sentiment = {}
+            for (happiness, score), n in self.sentiment_counts.items():
+                if n > 0:
+                    sentiment.setdefault(happiness, {})[score] = n
+            return {'entries': len(self.days), 'keywords': keywords_by_field, 'importance': importance,
+                    'sentiment': sentiment, 'overall_sentiment': sentiment_score(*self.sentiment_totals)}
+
+
+def theme_lines(themes):
+    """Human-readable one-line summaries of a TextCache.themes() result."""
+    if themes is None or not themes['entries']:
+        return []
+    lines = []
+    for name, found in themes['keywords'].items():
+        if found:
+            words = ', '.join(f"{word} ({n})" for word, n in found[:5])
+            lines.append(f"Recurring in {name.replace('_', ' ')}: {words}")
+    cells = [(happiness, score, n) for happiness, scores in themes['sentiment'].items()
+             for score, n in scores.items()]
+    entries = sum(n for _, _, n in cells)
+    if entries > 2:
+        import numpy as np
+        happiness, score, weight = np.array(cells, dtype=float).T
+        happiness -= np.average(happiness, weights=weight)
+        score -= np.average(score, weights=weight)
+        spread = np.sqrt(np.sum(weight * happiness ** 2) * np.sum(weight * score ** 2))
+        if spread > 0:
+            r = np.sum(weight * happiness * score) / spread
+            lines.append(f"Sentiment of notes and happy things vs Happiness: r = {r:+.2f} over {entries} entries")
+    return lines